@@ -0,0 +1,94 @@
+# ASSETS - Process-wide registry that loads every texture and sound exactly once
+# Safe to use from a background thread: a load in progress is waited for, never repeated.
+
+import threading
+import time
+import arcade
+
+# Every image and sound the game uses
+TEXTURE_PATHS = (
+    "images/tiles/blankTile.png",
+    "images/tiles/exitSign.png",
+    "images/items/cheese.png",
+    "images/sprites/white_mouse.png",
+    "images/sprites/grey_mouse.png",
+    "images/sprites/brown_mouse.png",
+)
+SOUND_PATHS = (
+    "sounds/collect.wav",
+    "sounds/pathfinder.wav",
+    "sounds/exit.wav",
+)
+
+# Loaded assets keyed by file path
+_textures = {}
+_flipped_textures = {}
+_sounds = {}
+
+# Load statistics keyed by file path: (kind, seconds, bytes)
+_load_stats = {}
+
+# Held while an asset loads, so two threads never load the same file
+_load_lock = threading.RLock()
+
+# Return the shared texture for an image, loading it on first use
+def get_texture(path):
+    texture = _textures.get(path)
+    if texture is None:
+        with _load_lock:
+            texture = _textures.get(path)
+            if texture is None:
+                start = time.perf_counter()
+                texture = arcade.load_texture(path)
+                image = texture.image
+                _load_stats[path] = ("texture", time.perf_counter() - start,
+                                     image.width * image.height * len(image.getbands()))
+                _textures[path] = texture
+    return texture
+
+# Return the shared left-right mirrored texture for an image
+def get_flipped_texture(path):
+    texture = _flipped_textures.get(path)
+    if texture is None:
+        with _load_lock:
+            texture = _flipped_textures.get(path)
+            if texture is None:
+                texture = get_texture(path).flip_left_right()
+                _flipped_textures[path] = texture
+    return texture
+
+# Return the shared sound for an audio file, decoding it on first use
+def get_sound(path):
+    sound = _sounds.get(path)
+    if sound is None:
+        with _load_lock:
+            sound = _sounds.get(path)
+            if sound is None:
+                start = time.perf_counter()
+                sound = arcade.load_sound(path)
+                source = sound.source
+                size = 0
+                if source.audio_format is not None:
+                    size = int(source.duration * source.audio_format.bytes_per_second)
+                _load_stats[path] = ("sound", time.perf_counter() - start, size)
+                _sounds[path] = sound
+    return sound
+
+# Load every known asset up front so no maze ever touches the filesystem or decoder
+def preload_all():
+    for path in TEXTURE_PATHS:
+        get_texture(path)
+    for path in SOUND_PATHS:
+        get_sound(path)
+
+# Build a table of load timings and decoded memory use for every loaded asset
+def load_report():
+    lines = [f"{'Asset':<34}{'Kind':<9}{'Load ms':>9}{'Memory KB':>11}"]
+    total_seconds = 0.0
+    total_bytes = 0
+    for path, (kind, seconds, size) in _load_stats.items():
+        lines.append(f"{path:<34}{kind:<9}{seconds * 1000:>9.2f}{size / 1024:>11.1f}")
+        total_seconds += seconds
+        total_bytes += size
+    lines.append(f"{'Total':<34}{'':<9}{total_seconds * 1000:>9.2f}{total_bytes / 1024:>11.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,118 @@
+# BATCH SOLVER - Solves a whole stack of same-size mazes at once with NumPy
+#
+# Runs one breadth-first search over every maze of a (mazes, rows, columns) tile stack (see
+# maze_metrics.maze_stack). The frontiers of all the mazes are kept together in one array of
+# flat tile indices and advanced a step at a time, so each step is a handful of NumPy calls
+# however many mazes there are, and its work follows the frontier rather than the maze area.
+# For every maze it gives the distance from the start to every tile, the solution length and
+# the solution path (in the same form as functions.astar). Unlike maze_metrics it doesn't
+# assume perfect mazes: any grid of walls and floor works.
+#
+#   solution = solve_mazes(maze_stack(mazes))
+#   solution.lengths[3], solution.path(3), solution.distances[3]
+#
+# solve_mazes_sharded splits a big batch into shards that worker processes solve side by side.
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from constants import TILE_EMPTY, BATCH_SOLVER_SHARD_SIZE
+
+# What solve_mazes found for every maze of a stack
+class BatchSolution:
+
+    def __init__(self, distances, lengths, paths):
+        self.distances = distances  # (mazes, rows, columns) steps from the start to each tile, -1 if unreachable
+        self.lengths = lengths  # Steps from the start to the goal of each maze, -1 if unreachable
+        self.paths = paths  # (mazes, longest length, 2) (row, column) from the goal back, padded with -1
+
+    # Return the solution path of one maze like functions.astar: (row, column) tiles from the
+    # goal back to (but not including) the start, or False if the goal can't be reached
+    def path(self, index):
+        length = self.lengths[index]
+        if length < 0:
+            return False
+        return [tuple(tile) for tile in self.paths[index, :length].tolist()]
+
+# Return the flat index steps to the four neighbors of a tile in a grid this wide
+def neighbor_steps(width):
+    return np.array([-1, 1, -width, width], dtype=np.int64)
+
+# Solve every maze of a (mazes, rows, columns) tile stack from start to goal (row, column)
+# The goal defaults to the exit corner, (rows - 2, columns - 2)
+def solve_mazes(tiles, start=(1, 1), goal=None):
+    count, rows, columns = tiles.shape
+    if goal is None:
+        goal = (rows - 2, columns - 2)
+
+    # A wall border around every maze keeps neighbor steps inside their own maze
+    walkable = np.pad(tiles == TILE_EMPTY, ((0, 0), (1, 1), (1, 1))).ravel()
+    width = columns + 2
+    area = (rows + 2) * width
+    steps = neighbor_steps(width)
+    firsts = np.arange(count, dtype=np.int64) * area  # Flat index of each maze's first tile
+
+    distances = np.full(walkable.shape, -1, dtype=np.int32)
+    frontier = firsts + (start[0] + 1) * width + start[1] + 1
+    frontier = frontier[walkable[frontier]]
+    distances[frontier] = 0
+    distance = 0
+    while frontier.size:
+        distance += 1
+        candidates = (frontier[:, None] + steps).ravel()
+        candidates = candidates[walkable[candidates]]
+        candidates = candidates[distances[candidates] < 0]
+        if distance > 1:
+            # Two frontier tiles can share a neighbor where a maze has loops: tag each candidate
+            # tile with its position and keep only the copy whose tag stuck (no sorting needed)
+            tags = -2 - np.arange(len(candidates), dtype=np.int32)
+            distances[candidates] = tags
+            candidates = candidates[distances[candidates] == tags]
+        distances[candidates] = distance
+        frontier = candidates
+
+    goals = firsts + (goal[0] + 1) * width + goal[1] + 1
+    lengths = distances[goals]
+    paths = trace_paths(distances, goals, lengths, steps)
+
+    # Flat padded indices back to (row, column), keeping the -1 padding
+    local = paths % area
+    paths = np.where(paths[..., None] < 0, -1, np.stack((local // width - 1, local % width - 1), axis=-1))
+    distances = np.ascontiguousarray(distances.reshape(count, rows + 2, width)[:, 1:-1, 1:-1])
+    return BatchSolution(distances, lengths.astype(np.int64), paths.astype(np.int32))
+
+# Walk every maze's distances downhill from its goal to its start, all mazes a step at a time
+# Returns (mazes, longest length) flat tile indices from the goal back, padded with -1
+def trace_paths(distances, goals, lengths, steps):
+    longest = max(int(lengths.max(initial=0)), 0)
+    paths = np.full((len(goals), longest), -1, dtype=np.int64)
+    mazes = np.flatnonzero(lengths > 0)
+    current = goals[mazes]
+    for index in range(longest):
+        # Mazes whose path is done drop out
+        ongoing = lengths[mazes] > index
+        mazes, current = mazes[ongoing], current[ongoing]
+        paths[mazes, index] = current
+        neighbors = current[:, None] + steps
+        downhill = distances[neighbors] == (distances[current] - 1)[:, None]
+        current = neighbors[np.arange(len(current)), downhill.argmax(axis=1)]
+    return paths
+
+# Combine the solutions of consecutive shards of a stack into one
+def combine_solutions(solutions):
+    longest = max(solution.paths.shape[1] for solution in solutions)
+    paths = [np.pad(solution.paths, ((0, 0), (0, longest - solution.paths.shape[1]), (0, 0)), constant_values=-1)
+             for solution in solutions]
+    return BatchSolution(np.concatenate([solution.distances for solution in solutions]),
+                         np.concatenate([solution.lengths for solution in solutions]),
+                         np.concatenate(paths))
+
+# Solve a stack of mazes in worker processes, shard_size mazes at a time, like solve_mazes
+# pool: Executor to solve the shards in (to reuse one across batches), or None to start workers for this call
+def solve_mazes_sharded(tiles, start=(1, 1), goal=None, workers=None, shard_size=BATCH_SOLVER_SHARD_SIZE, pool=None):
+    if pool is None:
+        with ProcessPoolExecutor(workers) as pool:
+            return solve_mazes_sharded(tiles, start, goal, shard_size=shard_size, pool=pool)
+
+    shards = [tiles[first:first + shard_size] for first in range(0, len(tiles), shard_size)]
+    # map keeps the shards in order, so every maze's results stay at its index
+    return combine_solutions(list(pool.map(solve_mazes, shards, [start] * len(shards), [goal] * len(shards))))
@@ -0,0 +1,396 @@
+# BENCHMARK - Measure the maze pipeline outside of the game
+#
+#   python benchmark.py                         Time and memory-profile every pipeline stage
+#   python benchmark.py --save baseline.json    ...and store the results as a baseline
+#   python benchmark.py --compare baseline.json ...and flag stages slower than the baseline
+#   python benchmark.py walls                   Compare wall sprite counts per merging strategy
+#   python benchmark.py astar                   Compare A* against the original implementation
+#   python benchmark.py generators              Compare the maze generators' speed and memory
+#   python benchmark.py solver                  Compare the batch solver against solving mazes one by one
+
+import argparse
+import heapq
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from types import SimpleNamespace
+import numpy as np
+
+# Arcade is imported lazily by the sprite stages; never open a visible window
+os.environ.setdefault("ARCADE_HEADLESS", "True")
+
+import constants
+from constants import TILE_CRATE, SIMULATION_TICK
+from functions import make_maze, merge_wall_runs, merge_wall_rects, choose_cheese_positions, astar
+from batch_solver import solve_mazes, solve_mazes_sharded
+from distance_field import DistanceField
+from maze_generators import GENERATORS, get_generator
+from maze_metrics import maze_stack
+
+BENCHMARK_SIZES = [21, 31, 51, 101, 201, 501, 1001, 2001]
+ASTAR_BENCHMARK_SIZES = [51, 201, 501, 1001]
+GENERATOR_BENCHMARK_SIZES = [21, 51, 101, 201, 501, 1001, 2001, 4001]
+SOLVER_BENCHMARK_SIZES = [21, 51, 101, 201]
+SOLVER_BENCHMARK_MAZES = 1024  # Mazes solved per size
+
+# Stages that build one sprite per tile or per cheese get too large to hold in memory beyond this
+SPRITE_BENCHMARK_MAX_SIZE = 501
+
+# Keep repeating a stage until it has run for this long (it always runs at least once)
+MIN_BENCHMARK_TIME = 0.5
+
+# Length of one simulated session, in ticks at SIMULATION_TICK seconds each
+SIMULATION_SESSION_TICKS = 600
+
+# A stage counts as a regression when it is this much slower than the baseline
+DEFAULT_REGRESSION_THRESHOLD = 0.15
+
+# The original dictionary-based A*, kept as the baseline for the A* benchmark
+def legacy_astar(maze, start, goal):
+    def heuristic(a, b):
+        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+    neighbors = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    close_set = set()
+    open_set = {start}
+    came_from = {}
+    gscore = {start: 0}
+    fscore = {start: heuristic(start, goal)}
+    oheap = []
+    heapq.heappush(oheap, (fscore[start], start))
+
+    while oheap:
+        current = heapq.heappop(oheap)[1]
+        if current == goal:
+            data = []
+            while current in came_from:
+                data.append(current)
+                current = came_from[current]
+            return data
+
+        close_set.add(current)
+        open_set.discard(current)
+        for i, j in neighbors:
+            neighbor = current[0] + i, current[1] + j
+            tentative_g_score = gscore[current] + 1
+            if not (0 <= neighbor[0] < len(maze) and 0 <= neighbor[1] < len(maze[0])):
+                continue
+            if maze[neighbor[0]][neighbor[1]] == 1:
+                continue
+            if neighbor in close_set and tentative_g_score >= gscore.get(neighbor, 0):
+                continue
+            if tentative_g_score < gscore.get(neighbor, 0) or neighbor not in open_set:
+                came_from[neighbor] = current
+                gscore[neighbor] = tentative_g_score
+                fscore[neighbor] = tentative_g_score + heuristic(neighbor, goal)
+                heapq.heappush(oheap, (fscore[neighbor], neighbor))
+                open_set.add(neighbor)
+
+    return False
+
+# Create an open grid with randomly scattered wall tiles and a walled border
+def make_open_grid(size, wall_chance=0.25):
+    grid = [bytearray(TILE_CRATE if random.random() < wall_chance else 0 for _ in range(size))
+            for _ in range(size)]
+    for index in range(size):
+        grid[0][index] = grid[size - 1][index] = grid[index][0] = grid[index][size - 1] = TILE_CRATE
+    grid[1][1] = grid[size - 2][size - 2] = 0
+    return grid
+
+# Compare how many wall sprites each merging strategy produces per maze size
+def benchmark_wall_merging(sizes):
+    print(f"{'Size':>6}{'Tiles':>10}{'Row runs':>10}{'2D merge':>10}{'Ratio':>8}{'Runs ms':>10}{'2D ms':>10}")
+    for size in sizes:
+        maze = make_maze(size, size)
+        tile_count = sum(row.count(TILE_CRATE) for row in maze)
+
+        start = time.perf_counter()
+        runs = merge_wall_runs(maze, size)
+        runs_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rects = merge_wall_rects(maze, size)
+        rects_time = time.perf_counter() - start
+
+        print(f"{size:>6}{tile_count:>10}{len(runs):>10}{len(rects):>10}"
+              f"{len(runs) / len(rects):>8.2f}{runs_time * 1000:>10.2f}{rects_time * 1000:>10.2f}")
+
+# Compare the flat-array A* against the original implementation from spawn to exit
+def benchmark_astar(sizes):
+    print(f"{'Grid':<8}{'Size':>6}{'Path':>9}{'Legacy ms':>12}{'A* ms':>10}{'Speedup':>9}")
+    for kind, make_grid in (("maze", lambda size: make_maze(size, size)), ("open", make_open_grid)):
+        for size in sizes:
+            grid = make_grid(size)
+            start, goal = (1, 1), (size - 2, size - 2)
+
+            begin = time.perf_counter()
+            legacy_path = legacy_astar(grid, start, goal)
+            legacy_time = time.perf_counter() - begin
+
+            begin = time.perf_counter()
+            path = astar(grid, start, goal)
+            astar_time = time.perf_counter() - begin
+
+            if bool(path) != bool(legacy_path) or (path and len(path) != len(legacy_path)):
+                print(f"{kind:<8}{size:>6}  path length mismatch")
+                continue
+            print(f"{kind:<8}{size:>6}{len(path or []):>9}{legacy_time * 1000:>12.2f}"
+                  f"{astar_time * 1000:>10.2f}{legacy_time / astar_time:>9.1f}")
+
+# Compare every maze generator's throughput (maze cells per second) and peak memory per size
+def benchmark_generators(sizes, only=None):
+    print(f"{'Generator':<12}{'Size':>6}{'Runs':>6}{'Mean ms':>11}{'Mcells/s':>10}{'Peak KB':>12}{'KB/Kcell':>10}")
+    for name in GENERATORS:
+        if only and name not in only:
+            continue
+        make_grid = get_generator(name)
+        for size in sizes:
+            cells = ((size - 1) // 2) ** 2
+            result = measure(make_grid, lambda: (size, size, random.Random(size)))
+            print(f"{name:<12}{size:>6}{result['runs']:>6}{result['mean_ms']:>11.2f}"
+                  f"{cells / result['mean_ms'] / 1000:>10.2f}{result['peak_kb']:>12.1f}"
+                  f"{result['peak_kb'] / cells * 1000:>10.2f}")
+
+# Compare solving a batch of mazes one by one (A* for the path, a distance field for the
+# distances) against the batch solver, on one process and sharded across every core
+def benchmark_solver(sizes, count=SOLVER_BENCHMARK_MAZES):
+    workers = os.cpu_count()
+    print(f"{'Size':>6}{'Mazes':>7}{'A* ms':>10}{'Field ms':>10}{'Batch ms':>10}"
+          f"{f'x{workers} ms':>10}{'Mazes/s':>10}{'Speedup':>9}")
+    for size in sizes:
+        mazes = [make_maze(size, size, random.Random(seed)) for seed in range(count)]
+        tiles = maze_stack(mazes)
+        start, goal = (1, 1), (size - 2, size - 2)
+
+        begin = time.perf_counter()
+        paths = [astar(maze, start, goal) for maze in mazes]
+        astar_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        for maze in mazes:
+            DistanceField(maze, start)
+        field_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        solution = solve_mazes(tiles, start, goal)
+        batch_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        sharded = solve_mazes_sharded(tiles, start, goal, workers)
+        sharded_time = time.perf_counter() - begin
+
+        if ([len(path) for path in paths] != solution.lengths.tolist()
+                or not np.array_equal(solution.distances, sharded.distances)):
+            print(f"{size:>6}  solution mismatch")
+            continue
+        best_time = min(batch_time, sharded_time)
+        print(f"{size:>6}{count:>7}{astar_time * 1000:>10.1f}{field_time * 1000:>10.1f}{batch_time * 1000:>10.1f}"
+              f"{sharded_time * 1000:>10.1f}{count / best_time:>10.0f}{(astar_time + field_time) / best_time:>9.1f}")
+
+# Time a stage and measure its peak allocations
+# make_args() prepares fresh arguments for each run and is not timed
+def measure(stage, make_args):
+    runs = 0
+    elapsed = 0.0
+    while runs == 0 or elapsed < MIN_BENCHMARK_TIME:
+        args = make_args()
+        start = time.perf_counter()
+        stage(*args)
+        elapsed += time.perf_counter() - start
+        runs += 1
+
+    # One extra traced run for memory, since tracing slows everything down
+    args = make_args()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    stage(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "runs": runs,
+        "mean_ms": elapsed / runs * 1000,
+        "ops_per_sec": runs / elapsed,
+        "peak_kb": peak / 1024,
+    }
+
+# Stand-in for a GameView holding only the sprite lists the sprite-building methods fill
+def make_sprite_target():
+    import arcade
+    return SimpleNamespace(
+        wall_list=arcade.SpriteList(lazy=True),
+        floor_list=arcade.SpriteList(lazy=True),
+        coin_list=arcade.SpriteList(lazy=True),
+    )
+
+# Build a GameView in a hidden headless window so setup() can run without a display
+def make_headless_game_view():
+    import arcade
+    from game import GameView
+    from view_manager import ViewManager
+
+    window = arcade.Window(constants.WINDOW_WIDTH, constants.WINDOW_HEIGHT, visible=False)
+    return GameView(ViewManager(window))
+
+# Run a full setup() for the given maze size with nothing prefetched
+def run_game_setup(game_view, maze_size):
+    constants.MAZE_SIZE_SETTING = maze_size
+    game_view.setup()
+    # Wait for the background prefetch so it doesn't overlap the next timed run
+    prefetcher = game_view.maze_prefetcher
+    if prefetcher.pending_key is not None:
+        build, args = prefetcher.pending_key
+        prefetcher.take(build, *args)
+
+# Play one headless session on a new maze, changing the held keys at random every few ticks
+def run_simulation_session(maze_size, rng):
+    from simulation import Simulation, DIRECTIONS
+
+    constants.MAZE_SIZE_SETTING = maze_size
+    simulation = Simulation()
+    simulation.start_maze()
+    for tick in range(SIMULATION_SESSION_TICKS):
+        if tick % 20 == 0:
+            for direction in DIRECTIONS:
+                simulation.set_direction(direction, rng.random() < 0.3)
+        simulation.step(SIMULATION_TICK)
+    return simulation
+
+# Return the pipeline stages as (name, largest size, function(size) -> (stage, make_args))
+def pipeline_stages():
+    from game import GameView
+
+    def maze_args(size):
+        return lambda: (size, size)
+
+    def grid_args(size):
+        maze = make_maze(size, size)
+        return lambda: (maze, (1, 1), (size - 2, size - 2))
+
+    def sprite_args(size, with_layout):
+        maze = make_maze(size, size)
+        extra = ()
+        if with_layout:
+            extra = (choose_cheese_positions(maze, size),)
+        return lambda: (make_sprite_target(), maze, size) + extra
+
+    def walls(merge_sprites):
+        def stage(target, maze, size):
+            GameView.create_maze_walls(target, maze, size, merge_sprites=merge_sprites)
+        return stage
+
+    def setup_stage(size):
+        game_view = make_headless_game_view()
+        return lambda: (game_view, size)
+
+    return [
+        ("make_maze", None, lambda size: (make_maze, maze_args(size))),
+        ("astar", None, lambda size: (astar, grid_args(size))),
+        ("merge_wall_rects", None, lambda size: (merge_wall_rects, lambda maze=make_maze(size, size): (maze, size))),
+        ("create_maze_walls[merged]", SPRITE_BENCHMARK_MAX_SIZE,
+         lambda size: (walls(True), sprite_args(size, False))),
+        ("create_maze_walls[per tile]", SPRITE_BENCHMARK_MAX_SIZE,
+         lambda size: (walls(False), sprite_args(size, False))),
+        ("create_maze_floor", SPRITE_BENCHMARK_MAX_SIZE,
+         lambda size: (GameView.create_maze_floor, sprite_args(size, False))),
+        ("place_cheese", SPRITE_BENCHMARK_MAX_SIZE,
+         lambda size: (GameView.place_cheese, sprite_args(size, True))),
+        ("simulation session", SPRITE_BENCHMARK_MAX_SIZE,
+         lambda size: (run_simulation_session, lambda: (size, random.Random(size)))),
+        ("GameView.setup", SPRITE_BENCHMARK_MAX_SIZE,
+         lambda size: (run_game_setup, setup_stage(size))),
+    ]
+
+# Time and memory-profile every pipeline stage at every size
+# Returns {"stage/size": measurement}
+def benchmark_pipeline(sizes, only=None):
+    results = {}
+    print(f"{'Stage':<30}{'Size':>6}{'Runs':>6}{'Mean ms':>11}{'Ops/sec':>11}{'Peak KB':>12}")
+    for name, max_size, prepare in pipeline_stages():
+        if only and not any(part in name for part in only):
+            continue
+        for size in sizes:
+            if max_size is not None and size > max_size:
+                continue
+            try:
+                stage, make_args = prepare(size)
+                result = measure(stage, make_args)
+            except Exception as ex:
+                # Sprite and window stages need arcade and a GL context
+                print(f"{name:<30}{size:>6}  skipped: {ex}")
+                break
+            results[f"{name}/{size}"] = result
+            print(f"{name:<30}{size:>6}{result['runs']:>6}{result['mean_ms']:>11.2f}"
+                  f"{result['ops_per_sec']:>11.2f}{result['peak_kb']:>12.1f}")
+    return results
+
+# Write benchmark results and the machine they were measured on to a JSON file
+def save_baseline(path, results):
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2)
+    print(f"Saved {len(results)} results to {path}")
+
+# Compare results against a stored baseline, returning the keys that got slower than the threshold
+def compare_to_baseline(path, results, threshold):
+    with open(path) as file:
+        baseline = json.load(file)["results"]
+
+    regressions = []
+    print(f"\n{'Stage':<38}{'Base ms':>11}{'Now ms':>11}{'Change':>9}{'Base KB':>12}{'Now KB':>12}")
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        base = baseline[key]
+        change = result["mean_ms"] / base["mean_ms"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"{key:<38}{base['mean_ms']:>11.2f}{result['mean_ms']:>11.2f}{change:>+9.0%}"
+              f"{base['peak_kb']:>12.1f}{result['peak_kb']:>12.1f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Minute Mazes maze pipeline")
+    parser.add_argument("suite", nargs="?", default="pipeline",
+                        choices=["pipeline", "walls", "astar", "generators", "solver"])
+    parser.add_argument("--sizes", type=int, nargs="+", help="maze sizes to benchmark")
+    parser.add_argument("--only", nargs="+",
+                        help="only run pipeline stages whose name contains one of these (or these generators)")
+    parser.add_argument("--save", metavar="PATH", help="save pipeline results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare pipeline results against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="slowdown that counts as a regression (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    if args.suite == "walls":
+        benchmark_wall_merging(args.sizes or BENCHMARK_SIZES)
+    elif args.suite == "astar":
+        benchmark_astar(args.sizes or ASTAR_BENCHMARK_SIZES)
+    elif args.suite == "generators":
+        benchmark_generators(args.sizes or GENERATOR_BENCHMARK_SIZES, args.only)
+    elif args.suite == "solver":
+        benchmark_solver(args.sizes or SOLVER_BENCHMARK_SIZES)
+    else:
+        results = benchmark_pipeline(args.sizes or BENCHMARK_SIZES, args.only)
+        if args.save:
+            save_baseline(args.save, results)
+        if args.compare:
+            regressions = compare_to_baseline(args.compare, results, args.threshold)
+            if regressions:
+                print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+                sys.exit(1)
+
+# Run the benchmark
+if __name__ == "__main__":
+    main()
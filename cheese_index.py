@@ -0,0 +1,37 @@
+# CHEESE INDEX - Cheese stored by maze tile, with a bitset of what has been collected
+
+# Looks cheese up by the tile it sits on, so collection only checks the tiles the player touches
+class CheeseIndex:
+
+    def __init__(self, positions, columns):
+        self.positions = positions  # (row, column) of each cheese, in sprite order
+        self.columns = columns
+        self.by_tile = {row * columns + column: index for index, (row, column) in enumerate(positions)}
+        self.collected = 0  # Bit i is set once cheese i has been collected
+
+    # Return the index of the uncollected cheese on a tile, or None
+    def cheese_at(self, row, column):
+        index = self.by_tile.get(row * self.columns + column)
+        if index is None or self.collected >> index & 1:
+            return None
+        return index
+
+    # Mark a cheese as collected
+    def collect(self, index):
+        self.collected |= 1 << index
+
+    # Return the indices of every collected cheese
+    def collected_indices(self):
+        indices = []
+        bits = self.collected
+        while bits:
+            lowest = bits & -bits
+            indices.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return indices
+
+    # Put all cheese back, returning the indices that had been collected
+    def reset(self):
+        indices = self.collected_indices()
+        self.collected = 0
+        return indices
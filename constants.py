@@ -14,23 +14,57 @@ WINDOW_TITLE = "MINUTE MAZES"
 MOVEMENT_SPEED = 5
 DIAGONAL_MOVEMENT_FACTOR = 0.7071  # 1/sqrt(2) for normalized diagonal movement
 
+# Hit boxes as (left, right, bottom, top) offsets from the sprite center, matching the
+# mouse and cheese textures at SPRITE_SCALING
+PLAYER_HIT_BOX = (-12.5, 12.5, -10.75, 9.75)
+CHEESE_HIT_BOX = (-11.875, 11.875, -9.0, 9.0)
+
 # Camera configuration
 CAMERA_SPEED = 0.2
 CAMERA_ZOOM = 2.0
 
 # Audio configuration
+MUSIC_PATH = "sounds/music.mp3"  # Streamed and looped by music.py, never decoded whole
 MUSIC_VOLUME_MULTIPLIER = 0.3
 SOUND_VOLUME_MULTIPLIER = 0.3
+# Sound effects: name -> (path, voices, cooldown). Voices caps how many copies play at once
+# (the oldest is cut off to start another); cooldown is the seconds before it can start again.
+SOUND_EFFECTS = {
+    "collect": ("sounds/collect.wav", 4, 0.05),
+    "pathfinder": ("sounds/pathfinder.wav", 1, 0.25),
+    "exit": ("sounds/exit.wav", 1, 0.5),
+}
 
 # Timing configuration
 CONGRATULATIONS_DELAY = 10.0
+SIMULATION_TICK = 1 / 60  # The game advances in fixed steps of this many seconds
+MAX_TICKS_PER_FRAME = 5  # After a long stall, drop the time beyond this many steps
+STARTUP_FONT_WARMUP_DELAY = 0.1  # Seconds after startup the HUD font is rendered, once the main menu is up
+STARTUP_PROFILE_MENU_IDLE = 0.5  # Seconds play.py --startup-profile waits on the main menu before starting a game
 
 # Tile types
 TILE_EMPTY = 0
 TILE_CRATE = 1
 
+# Cheese configuration
+CHEESE_SPAWN_CHANCE = 0.08  # Chance for each walkable tile to hold cheese
+
 # Sprite optimization
 MERGE_SPRITES = True
+BAKE_MAZE_TEXTURE = True  # Draw floor and walls as one pre-rendered texture
+CULL_CHUNK_TILES = 16  # Sprite layers are split into squares this many tiles across, drawn only when on screen
+
+# Maze generation (see maze_generators.py)
+MAZE_ELLER_JOIN_CHANCE = 0.5  # Chance for Eller's algorithm to join neighboring cells that aren't connected yet
+MAZE_ELLER_UP_CHANCE = 0.35  # Chance for each cell to open upward in Eller's algorithm
+MAZE_WALK_BATCH = 65536  # Random directions Wilson's algorithm draws at a time
+
+# Maze library (pre-generated mazes, built with maze_library.py)
+MAZE_LIBRARY_PATH = "mazes/library.mml"
+USE_MAZE_LIBRARY = True  # Draw mazes from the library when it exists and has the size
+
+# Batch solver (see batch_solver.py)
+BATCH_SOLVER_SHARD_SIZE = 256  # Mazes each worker process solves at a time
 
 # Pathfinder configuration
 PATHFINDER_MAX_USES = 3
@@ -44,10 +78,28 @@ STORY_MODE_MAZE_SEQUENCE = [
     51, 51, 51  # 3 large mazes
 ]
 STORY_MODE_TOTAL_MAZES = 10
+STORY_MODE_CURATION = True  # Pick each story maze from candidates to follow STORY_MODE_DIFFICULTY_CURVE
+STORY_MODE_CANDIDATES = 32  # Candidate mazes generated and measured for each story maze
+STORY_MODE_DIFFICULTY_CURVE = [  # Target difficulty of each story maze, as a percentile of its candidates
+    0.2, 0.5, 0.8,
+    0.3, 0.5, 0.7, 0.9,
+    0.6, 0.8, 1.0
+]
+STORY_MODE_DIFFICULTY_WEIGHTS = {"solution_length": 0.4, "dead_ends": 0.2, "branching": 0.2, "river": 0.2}
+STORY_MODE_CURATION_WORKERS = 2  # Worker processes that generate and measure the candidates
+
+# Endless mode configuration
+ENDLESS_MAZE_WIDTH = 31  # Tiles across; the maze has no top
+ENDLESS_CHUNK_ROWS = 16  # Rows generated at a time (must be even)
+ENDLESS_CHUNKS_AHEAD = 1  # Chunks kept generated above the player
+ENDLESS_CHUNKS_BEHIND = 2  # Chunks kept below the player before they are evicted and walled off
+ENDLESS_JOIN_CHANCE = 0.5  # Chance to join neighboring cells that aren't connected yet
+ENDLESS_UP_CHANCE = 0.35  # Chance for each cell to open upward (every set opens at least once)
 
 # Game settings (mutable - can be changed by user)
 MAZE_SIZE_SETTING = 21  # Options: 21 (Small), 31 (Medium), 51 (Large)
 MOUSE_COLOR_SETTING = "white"  # Options: "white", "grey", "brown"
+MAZE_GENERATOR_SETTING = "dfs"  # Options: "dfs", "kruskal", "prim", "wilson", "eller" (applies to new games)
 VOLUME_SETTING = 0.5  # Range: 0.0 to 1.0
 
 # UI configuration
@@ -60,4 +112,15 @@ UI_BUTTON_HEIGHT_SMALL = 40
 UI_SPACING_LARGE = 30
 UI_SPACING_MEDIUM = 20
 UI_SPACING_SMALL = 15
-UI_SPACING_TINY = 10
\ No newline at end of file
+UI_SPACING_TINY = 10
+# HUD configuration
+HUD_FONT_SIZE = 16
+HUD_LEFT = 20
+HUD_LINE_HEIGHT = 20
+HUD_TIME_REFRESH_RATE = 10  # Times per second the time readout is updated
+
+# Profiler configuration (F3 toggles the overlay in game)
+PROFILER_WINDOW_FRAMES = 240  # Frames the overlay's percentiles are taken over
+PROFILER_OVERLAY_REFRESH_RATE = 4  # Times per second the overlay is updated
+PROFILER_OVERLAY_WIDTH = 300
+PROFILER_TRACE_MAX_EVENTS = 1_000_000  # Phases kept for a trace file, oldest dropped first
@@ -0,0 +1,102 @@
+# DISTANCE FIELD - Breadth-first distances from every maze tile to the exit
+
+from array import array
+from constants import TILE_CRATE
+
+# Distance in steps from every tile to one goal tile, computed once per maze.
+# Following the distances downhill from any tile walks the shortest path to the goal.
+class DistanceField:
+
+    def __init__(self, maze, goal):
+        self.rows = len(maze)
+        self.columns = len(maze[0])
+        self.goal = goal
+        self.distances = self.compute(b"".join(bytes(row) for row in maze))
+
+    # Breadth-first search outwards from the goal, -1 marks unreachable tiles
+    def compute(self, tiles):
+        columns = self.columns
+        distances = array("i", [-1]) * (self.rows * columns)
+        start = self.goal[0] * columns + self.goal[1]
+        distances[start] = 0
+
+        frontier = [start]
+        distance = 0
+        while frontier:
+            distance += 1
+            next_frontier = []
+            for tile in frontier:
+                column = tile % columns
+                for neighbor in (tile - columns, tile + columns,
+                                 tile - 1 if column > 0 else -1,
+                                 tile + 1 if column < columns - 1 else -1):
+                    if (0 <= neighbor < len(tiles) and distances[neighbor] < 0
+                            and tiles[neighbor] != TILE_CRATE):
+                        distances[neighbor] = distance
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return distances
+
+    # Return the number of steps from a tile to the goal, or -1 if it can't reach it
+    def distance(self, row, column):
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return self.distances[row * self.columns + column]
+        return -1
+
+    # Return a neighbor of a tile one step closer to the goal (the tile has that distance + 1)
+    def downhill(self, tile, distance):
+        columns = self.columns
+        distances = self.distances
+        for neighbor in (tile - columns, tile + columns, tile - 1, tile + 1):
+            if 0 <= neighbor < len(distances) and distances[neighbor] == distance - 1:
+                return neighbor
+        return tile
+
+    # Return up to count (row, column) tiles of the shortest path after the given tile
+    def next_tiles(self, row, column, count):
+        distance = self.distance(row, column)
+        if distance < 0:
+            return []
+
+        tile = row * self.columns + column
+        path = []
+        while distance > 0 and len(path) < count:
+            tile = self.downhill(tile, distance)
+            distance -= 1
+            path.append(divmod(tile, self.columns))
+        return path
+
+# The shortest path to a distance field's goal, kept between lookups so following it is O(count).
+# tiles[d] is the path's tile d steps from the goal, so a tile is on the path exactly when it
+# sits at its own distance in the list, and the tiles ahead of it are the ones before it.
+# In a perfect maze the path from any tile joins the cached one and follows it to the goal, so
+# leaving the path only costs walking back to it: the walk replaces the cached path's far end.
+class CachedPath:
+
+    def __init__(self, field):
+        self.field = field
+        self.tiles = [field.goal[0] * field.columns + field.goal[1]]
+
+    # Return up to count (row, column) tiles of the shortest path after the given tile,
+    # like DistanceField.next_tiles
+    def next_tiles(self, row, column, count):
+        field = self.field
+        distance = field.distance(row, column)
+        if distance < 0:
+            return []
+
+        tiles = self.tiles
+        tile = row * field.columns + column
+        if distance >= len(tiles) or tiles[distance] != tile:
+            # Off the path: walk downhill until it's rejoined, then swap the walk in past that point
+            branch = []
+            step_tile, step_distance = tile, distance
+            while step_distance >= len(tiles) or tiles[step_distance] != step_tile:
+                branch.append(step_tile)
+                step_tile = field.downhill(step_tile, step_distance)
+                step_distance -= 1
+            del tiles[step_distance + 1:]
+            tiles.extend(reversed(branch))
+
+        columns = field.columns
+        return [divmod(tile, columns) for tile in reversed(tiles[max(distance - count, 0):distance])]
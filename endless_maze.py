@@ -0,0 +1,191 @@
+# ENDLESS MAZE - A maze with no top, generated a chunk of rows at a time with Eller's algorithm
+
+import random
+from constants import (
+    TILE_EMPTY,
+    TILE_CRATE,
+    CHEESE_SPAWN_CHANCE,
+    ENDLESS_CHUNK_ROWS,
+    ENDLESS_CHUNKS_AHEAD,
+    ENDLESS_CHUNKS_BEHIND,
+    ENDLESS_JOIN_CHANCE,
+    ENDLESS_UP_CHANCE
+)
+
+# Generates a maze one row of cells at a time, keeping only the current row's sets (Eller's algorithm)
+# Every set of cells continues into the next row at least once, so every cell generated so far
+# has a way up to the newest row.
+class EllerRows:
+
+    def __init__(self, width, rng=random):
+        self.width = width
+        self.cell_columns = (width - 1) // 2
+        self.rng = rng
+        self.sets = [0] * self.cell_columns  # Set of each cell in the next row, 0 for a new set
+        self.next_set = 1
+
+    # Forget which cells are connected below, so the next row starts fresh sets
+    # Everything generated after this is connected upward without going below this row
+    def reset_sets(self):
+        self.sets = [0] * self.cell_columns
+
+    # Generate the next row of cells and the row of walls above it
+    # Returns (cell row, wall row) as bytearrays of tiles
+    def next_rows(self):
+        rng = self.rng
+        sets = self.sets
+        cell_row = bytearray([TILE_CRATE]) * self.width
+        wall_row = bytearray([TILE_CRATE]) * self.width
+
+        # Cells that didn't come up from the row below start their own set
+        for column in range(self.cell_columns):
+            cell_row[2 * column + 1] = TILE_EMPTY
+            if not sets[column]:
+                sets[column] = self.next_set
+                self.next_set += 1
+
+        # Randomly join neighbors that aren't connected yet
+        for column in range(self.cell_columns - 1):
+            if sets[column] != sets[column + 1] and rng.random() < ENDLESS_JOIN_CHANCE:
+                cell_row[2 * column + 2] = TILE_EMPTY
+                merged, kept = sets[column + 1], sets[column]
+                for index in range(self.cell_columns):
+                    if sets[index] == merged:
+                        sets[index] = kept
+
+        # Every set continues up at least once; the cells that don't go up are walled off above
+        members = {}
+        for column, cell_set in enumerate(sets):
+            members.setdefault(cell_set, []).append(column)
+        next_sets = [0] * self.cell_columns
+        for cell_set, columns in members.items():
+            up = [column for column in columns if rng.random() < ENDLESS_UP_CHANCE]
+            if not up:
+                up = [columns[int(rng.random() * len(columns))]]
+            for column in up:
+                wall_row[2 * column + 1] = TILE_EMPTY
+                next_sets[column] = cell_set
+
+        self.sets = next_sets
+        return cell_row, wall_row
+
+# A band of ENDLESS_CHUNK_ROWS rows of the endless maze
+class MazeChunk:
+
+    def __init__(self, index, first_row, rows, cheese_positions):
+        self.index = index
+        self.first_row = first_row
+        self.rows = rows  # bytearray per row, bottom first
+        self.cheese_positions = cheese_positions  # (row, column), row counted from the maze bottom
+
+    # Row after the last row of the chunk
+    @property
+    def end_row(self):
+        return self.first_row + len(self.rows)
+
+# A maze that is width tiles wide and endless upward. Chunks are generated in order ahead of
+# the player and evicted once they fall far enough behind, so memory stays proportional to the
+# width. Evicted rows become solid wall; Eller's sets are reset at the start of every chunk so
+# the rows that are kept always have a way up on their own.
+# Cheese is identified by its tile number, row * width + column.
+class EndlessMaze:
+
+    def __init__(self, width, seed=None, chunk_rows=ENDLESS_CHUNK_ROWS):
+        self.width = width
+        self.chunk_rows = chunk_rows
+        self.rng = random.Random(seed)
+        self.generator = EllerRows(width, self.rng)
+        self.chunks = {}  # index -> MazeChunk, for the chunks in memory
+        self.next_chunk = 0  # Index of the next chunk to generate
+        self.first_row = 0  # Rows below this have been evicted
+        self.uncollected = set()  # Tile numbers of cheese in memory that hasn't been collected
+        self.solid_row = bytes([TILE_CRATE]) * width
+
+        # The first chunk starts with the bottom wall; later chunks start with the walls above
+        # the previous chunk's last row of cells
+        self.pending_row = bytearray(self.solid_row)
+
+    # Return the row of tiles at a row index (solid wall where nothing is in memory)
+    def __getitem__(self, row):
+        chunk = self.chunks.get(row // self.chunk_rows)
+        if chunk is None:
+            return self.solid_row
+        return chunk.rows[row - chunk.first_row]
+
+    # Return True if the tile blocks movement
+    def is_blocked(self, row, column):
+        if not 0 <= column < self.width:
+            return True
+        return self[row][column] == TILE_CRATE
+
+    # Return the index of the chunk holding a row
+    def chunk_index(self, row):
+        return max(0, row // self.chunk_rows)
+
+    # Generate the next chunk, returning it
+    def generate_chunk(self):
+        index = self.next_chunk
+        first_row = index * self.chunk_rows
+        rows = [self.pending_row]
+        self.generator.reset_sets()
+        while len(rows) < self.chunk_rows:
+            cell_row, wall_row = self.generator.next_rows()
+            rows.append(cell_row)
+            if len(rows) < self.chunk_rows:
+                rows.append(wall_row)
+            else:
+                self.pending_row = wall_row
+
+        # Cheese anywhere walkable except the spawn tile
+        random_value = self.rng.random
+        cheese_positions = []
+        for offset, tiles in enumerate(rows):
+            row = first_row + offset
+            for column in range(1, self.width - 1):
+                if tiles[column] == TILE_EMPTY and (row, column) != (1, 1) and random_value() < CHEESE_SPAWN_CHANCE:
+                    cheese_positions.append((row, column))
+                    self.uncollected.add(row * self.width + column)
+
+        chunk = MazeChunk(index, first_row, rows, cheese_positions)
+        self.chunks[index] = chunk
+        self.next_chunk += 1
+        return chunk
+
+    # Generate chunks until the one holding a row exists
+    # Returns the chunks that were generated
+    def ensure_row(self, row):
+        generated = []
+        while self.next_chunk <= self.chunk_index(row):
+            generated.append(self.generate_chunk())
+        return generated
+
+    # Drop every chunk below the one holding a row
+    # Returns the indices of the evicted chunks
+    def evict_below(self, row):
+        evicted = []
+        for index in sorted(self.chunks):
+            if index >= self.chunk_index(row):
+                break
+            chunk = self.chunks.pop(index)
+            for (cheese_row, column) in chunk.cheese_positions:
+                self.uncollected.discard(cheese_row * self.width + column)
+            self.first_row = chunk.end_row
+            evicted.append(index)
+        return evicted
+
+    # Keep ENDLESS_CHUNKS_AHEAD chunks generated above the player's row and
+    # ENDLESS_CHUNKS_BEHIND chunks below it
+    # Returns (generated chunks, evicted chunk indices)
+    def follow(self, row):
+        generated = self.ensure_row(row + ENDLESS_CHUNKS_AHEAD * self.chunk_rows)
+        evicted = self.evict_below(row - ENDLESS_CHUNKS_BEHIND * self.chunk_rows)
+        return generated, evicted
+
+    # Return the tile number of the uncollected cheese on a tile, or None
+    def cheese_at(self, row, column):
+        tile = row * self.width + column
+        return tile if tile in self.uncollected else None
+
+    # Mark a cheese as collected
+    def collect(self, tile):
+        self.uncollected.discard(tile)
@@ -1,107 +1,257 @@
 # FUNCTIONS
 
 import random
-import heapq
-from constants import TILE_EMPTY, TILE_CRATE
-
-# Create a grid with empty cells on odd row/column combinations
-def create_grid_with_cells(width, height):
-    grid = []
-    for row in range(height):
-        grid.append([])
-        for column in range(width):
-            if column % 2 == 1 and row % 2 == 1:
-                grid[row].append(TILE_EMPTY)
-            elif column == 0 or row == 0 or column == width - 1 or row == height - 1:
-                grid[row].append(TILE_CRATE)
-            else:
-                grid[row].append(TILE_CRATE)
+import numpy as np
+from array import array
+from constants import TILE_EMPTY, TILE_CRATE, CHEESE_SPAWN_CHANCE
+
+# Marker for maze cells the generator has not carved into yet
+TILE_UNVISITED = 2
+
+# Create a flat grid (one byte per tile, row by row) with empty cells on odd row/column combinations
+def create_grid_with_cells(width, height, cell_tile=TILE_EMPTY):
+    cell_columns = (width - 1) // 2
+    cell_rows = (height - 1) // 2
+
+    wall_row = bytes([TILE_CRATE]) * width
+    cell_row = bytearray(wall_row)
+    cell_row[1:2 * cell_columns:2] = bytes([cell_tile]) * cell_columns
+
+    grid = bytearray(wall_row + (bytes(cell_row) + wall_row) * cell_rows)
+    grid += wall_row * (height - len(grid) // width)
     return grid
 
+# Split a flat grid into rows so it can be indexed as maze[row][column]
+def grid_rows(grid, width):
+    return [grid[index:index + width] for index in range(0, len(grid), width)]
+
 # Create a maze using depth-first search algorithm
 # The maze is created by walking through the grid and creating walls between cells
 # The walls are created by setting the cell to TILE_EMPTY
-def make_maze(maze_width, maze_height):
-    maze = create_grid_with_cells(maze_width, maze_height)
+# The walk uses an explicit stack on a flat bytearray, so the maze size is not
+# limited by Python's recursion limit. Returns the flat grid (row by row).
+def make_maze_grid(maze_width, maze_height, rng=random):
+    # Unvisited cells are marked so the grid doubles as the visited set.
+    # One extra wall row at the end keeps neighbor lookups in bounds: moving
+    # up from the first cell row wraps to the (wall) last row, moving left from
+    # the first column lands on the previous row's wall column, and moving down
+    # from the last cell row lands on the padding row.
+    grid = create_grid_with_cells(maze_width, maze_height, TILE_UNVISITED)
+    grid += bytes([TILE_CRATE]) * maze_width
 
-    w = (len(maze[0]) - 1) // 2
-    h = (len(maze) - 1) // 2
-    vis = [[0] * w + [1] for _ in range(h)] + [[1] * (w + 1)]
+    cell_columns = (maze_width - 1) // 2
+    cell_rows = (maze_height - 1) // 2
+    if cell_columns <= 0 or cell_rows <= 0:
+        del grid[maze_width * maze_height:]
+        return grid
 
-    def walk(x: int, y: int):
-        vis[y][x] = 1
+    # Open directions for every combination of unvisited neighbors
+    # (bit 0 = left, bit 1 = right, bit 2 = down, bit 3 = up)
+    directions = (-1, 1, -maze_width, maze_width)
+    choices = [tuple(step for bit, step in enumerate(directions) if mask >> bit & 1) for mask in range(16)]
+    two_rows = 2 * maze_width
 
-        d = [(x - 1, y), (x, y + 1), (x + 1, y), (x, y - 1)]
-        random.shuffle(d)
-        for (xx, yy) in d:
-            if vis[yy][xx]:
-                continue
-            if xx == x:
-                maze[max(y, yy) * 2][x * 2 + 1] = TILE_EMPTY
-            if yy == y:
-                maze[y * 2 + 1][max(x, xx) * 2] = TILE_EMPTY
+    cell = (2 * rng.randrange(cell_rows) + 1) * maze_width + 2 * rng.randrange(cell_columns) + 1
+    grid[cell] = TILE_EMPTY
+    stack = []
+    random_value = rng.random
 
-            walk(xx, yy)
+    while True:
+        # TILE_UNVISITED is the only tile value with bit 1 set
+        options = choices[grid[cell - 2] >> 1 | grid[cell + 2] & 2 |
+                          (grid[cell - two_rows] & 2) << 1 | (grid[cell + two_rows] & 2) << 2]
+        if options:
+            if len(options) > 1:
+                # Only cells with other unvisited neighbors need to be revisited
+                stack.append(cell)
+                step = options[int(random_value() * len(options))]
+            else:
+                step = options[0]
+            grid[cell + step] = TILE_EMPTY
+            cell += 2 * step
+            grid[cell] = TILE_EMPTY
+        elif stack:
+            cell = stack.pop()
+        else:
+            break
+
+    del grid[maze_width * maze_height:]
+    return grid
 
-    walk(random.randrange(w), random.randrange(h))
+# Create a maze as a list of rows, indexed as maze[row][column]
+def make_maze(maze_width, maze_height, rng=random):
+    grid = make_maze_grid(maze_width, maze_height, rng)
 
     # Don't create entrance and exit openings - keep walls intact
-    # maze[1][0] = TILE_EMPTY  # Entrance (removed)
-    # maze[maze_height - 2][maze_width - 1] = TILE_EMPTY  # Exit (removed)
+    # grid[maze_width] = TILE_EMPTY  # Entrance (removed)
+    # grid[(maze_height - 2) * maze_width + maze_width - 1] = TILE_EMPTY  # Exit (removed)
+
+    return grid_rows(grid, maze_width)
+
+# Merge consecutive wall tiles in each row into rectangles (one rectangle per row run)
+# Returns a list of (column, row, width, height) in tiles
+def merge_wall_runs(maze, maze_size):
+    rects = []
+    for row in range(maze_size):
+        tiles = maze[row]
+        column = 0
+        while column < maze_size:
+            while column < maze_size and tiles[column] == TILE_EMPTY:
+                column += 1
+            start_column = column
+            while column < maze_size and tiles[column] == TILE_CRATE:
+                column += 1
+            if column > start_column:
+                rects.append((start_column, row, column - start_column, 1))
+    return rects
+
+# Convert a maze (list of rows) into a 2D NumPy array of tiles
+def maze_array(maze):
+    return np.frombuffer(b"".join(bytes(row) for row in maze), dtype=np.uint8).reshape(len(maze), -1)
 
-    return maze
+# Find the maximal runs of True along each row of a boolean array
+# Returns (rows, starts, ends) arrays, with ends exclusive
+def _find_runs(mask):
+    edges = np.diff(np.pad(mask, ((0, 0), (1, 1))).view(np.int8), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)[1]
+    return rows, starts, ends
 
-# Heuristic function
-def heuristic(a, b):
-    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+# Mark every tile covered by the given runs
+def _runs_mask(shape, rows, starts, ends):
+    marks = np.zeros((shape[0], shape[1] + 1), dtype=np.int32)
+    marks[rows, starts] = 1
+    marks[rows, ends] = -1
+    return np.cumsum(marks, axis=1)[:, :-1] > 0
+
+# Count the True tiles of a boolean array inside each run
+def _count_in_runs(values, rows, starts, ends):
+    totals = np.zeros((values.shape[0], values.shape[1] + 1), dtype=np.int32)
+    np.cumsum(values, axis=1, out=totals[:, 1:])
+    return totals[rows, ends] - totals[rows, starts]
+
+# Cover the wall tiles with a near-minimal set of (possibly overlapping) rectangles
+# Horizontal wall runs are kept whole, vertical runs are added for the tiles they miss,
+# and horizontal runs left fully covered by the vertical ones are dropped again.
+# Returns a list of (column, row, width, height) in tiles
+def merge_wall_rects(maze, maze_size):
+    walls = maze_array(maze)[:maze_size, :maze_size] == TILE_CRATE
+
+    # Horizontal runs at least two tiles long
+    h_rows, h_starts, h_ends = _find_runs(walls)
+    long_runs = h_ends - h_starts >= 2
+    h_rows, h_starts, h_ends = h_rows[long_runs], h_starts[long_runs], h_ends[long_runs]
+
+    # Vertical runs (found along the rows of the transposed grid) that cover a missed tile
+    missed = (walls & ~_runs_mask(walls.shape, h_rows, h_starts, h_ends)).T
+    v_columns, v_starts, v_ends = _find_runs(walls.T)
+    needed = _count_in_runs(missed, v_columns, v_starts, v_ends) > 0
+    v_columns, v_starts, v_ends = v_columns[needed], v_starts[needed], v_ends[needed]
+
+    # Drop horizontal runs that the vertical runs already cover
+    v_covered = _runs_mask(missed.shape, v_columns, v_starts, v_ends).T
+    needed = _count_in_runs(~v_covered, h_rows, h_starts, h_ends) > 0
+    h_rows, h_starts, h_ends = h_rows[needed], h_starts[needed], h_ends[needed]
+
+    rects = [(start, row, end - start, 1)
+             for row, start, end in zip(h_rows.tolist(), h_starts.tolist(), h_ends.tolist())]
+    rects += [(column, start, 1, end - start)
+              for column, start, end in zip(v_columns.tolist(), v_starts.tolist(), v_ends.tolist())]
+    return rects
+
+# Choose random walkable tiles for cheese, skipping the player spawn and the exit
+# Returns a list of (row, column)
+def choose_cheese_positions(maze, maze_size, rng=random):
+    player_pos = (1, 1)
+    exit_pos = (maze_size - 2, maze_size - 2)
+    random_value = rng.random
+
+    positions = []
+    for row in range(1, maze_size - 1):
+        tiles = maze[row]
+        for column in range(1, maze_size - 1):
+            # Check if tile is empty, not player/exit position, and random chance
+            if (tiles[column] == TILE_EMPTY and
+                (row, column) != player_pos and
+                (row, column) != exit_pos and
+                random_value() < CHEESE_SPAWN_CHANCE):
+                positions.append((row, column))
+    return positions
 
 # A* algorithm
+# Returns the path from goal back to (but not including) start as (row, column) tiles,
+# or False if the goal can't be reached.
+# Runs on a flattened copy of the grid, padded with walls so neighbors never need bounds
+# checks, with preallocated score arrays indexed by cell. Every step costs 1 and the
+# Manhattan heuristic changes by exactly 1 per step, so f = g + h either stays the same
+# (step toward the goal) or grows by 2. That makes a two-bucket queue an exact priority
+# queue: cells with the current f and cells with f + 2. Stale entries are skipped when
+# popped (lazy deletion). Within a bucket the newest cell is expanded first.
 def astar(maze, start, goal):
-    neighbors = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    walls = np.pad(maze_array(maze) == TILE_CRATE, 1, constant_values=True)
+    width = walls.shape[1]
+    size = walls.size
+
+    # Walls get a score of -1 so the "better score" check also rejects them
+    gscore = array("i")
+    gscore.frombytes(np.where(walls.ravel(), -1, size).astype(np.int32).tobytes())
+    came_from = array("i")
+    came_from.frombytes(bytes(gscore.itemsize * size))
+    closed = bytearray(size)
 
-    close_set = set()
-    open_set = {start}  # Track open nodes in a set for O(1) lookup
-    came_from = {}
-    gscore = {start: 0}
-    fscore = {start: heuristic(start, goal)}
-    oheap = []
+    start_cell = (start[0] + 1) * width + start[1] + 1
+    goal_cell = (goal[0] + 1) * width + goal[1] + 1
+    goal_column = goal[1] + 1
+    goal_row_start = (goal[0] + 1) * width
+    goal_row_end = goal_row_start + width
 
-    heapq.heappush(oheap, (fscore[start], start))
+    gscore[start_cell] = 0
+    current = [start_cell]  # Cells with the lowest f
+    later = []  # Cells with f + 2
 
-    while oheap:
-        current = heapq.heappop(oheap)[1]
+    while True:
+        if not current:
+            if not later:
+                return False
+            current, later = later, current
 
-        if current == goal:
+        cell = current.pop()
+        if closed[cell]:
+            continue
+
+        if cell == goal_cell:
             data = []
-            while current in came_from:
-                data.append(current)
-                current = came_from[current]
+            while cell != start_cell:
+                row, column = divmod(cell, width)
+                data.append((row - 1, column - 1))
+                cell = came_from[cell]
             return data
 
-        close_set.add(current)
-        open_set.discard(current)
-        
-        for i, j in neighbors:
-            neighbor = current[0] + i, current[1] + j
-            tentative_g_score = gscore[current] + 1
-            
-            if 0 <= neighbor[0] < len(maze):
-                if 0 <= neighbor[1] < len(maze[0]):
-                    if maze[neighbor[0]][neighbor[1]] == 1:
-                        continue
-                else:
-                    continue
-            else:
-                continue
+        closed[cell] = 1
+        column = cell % width
+        tentative_g_score = gscore[cell] + 1
+
+        # Right, up, left, down (rows grow upwards in the game world)
+        neighbor = cell + 1
+        if tentative_g_score < gscore[neighbor]:
+            gscore[neighbor] = tentative_g_score
+            came_from[neighbor] = cell
+            (current if column < goal_column else later).append(neighbor)
 
-            if neighbor in close_set and tentative_g_score >= gscore.get(neighbor, 0):
-                continue
+        neighbor = cell + width
+        if tentative_g_score < gscore[neighbor]:
+            gscore[neighbor] = tentative_g_score
+            came_from[neighbor] = cell
+            (current if cell < goal_row_start else later).append(neighbor)
 
-            if tentative_g_score < gscore.get(neighbor, 0) or neighbor not in open_set:
-                came_from[neighbor] = current
-                gscore[neighbor] = tentative_g_score
-                fscore[neighbor] = tentative_g_score + heuristic(neighbor, goal)
-                heapq.heappush(oheap, (fscore[neighbor], neighbor))
-                open_set.add(neighbor)
+        neighbor = cell - 1
+        if tentative_g_score < gscore[neighbor]:
+            gscore[neighbor] = tentative_g_score
+            came_from[neighbor] = cell
+            (current if column > goal_column else later).append(neighbor)
 
-    return False
+        neighbor = cell - width
+        if tentative_g_score < gscore[neighbor]:
+            gscore[neighbor] = tentative_g_score
+            came_from[neighbor] = cell
+            (current if cell >= goal_row_end else later).append(neighbor)
@@ -1,7 +1,7 @@
-# GAME - Main gameplay view and logic
+# GAME - Main gameplay view, rendering the simulation and feeding it input
 
-import random
 import arcade
+from PIL import Image
 import constants
 from constants import (
     SPRITE_SCALING,
@@ -10,128 +10,185 @@ from constants import (
     TILE_EMPTY,
     TILE_CRATE,
     MERGE_SPRITES,
-    MOVEMENT_SPEED,
-    DIAGONAL_MOVEMENT_FACTOR,
+    BAKE_MAZE_TEXTURE,
     CAMERA_SPEED,
     CAMERA_ZOOM,
-    MUSIC_VOLUME_MULTIPLIER,
-    SOUND_VOLUME_MULTIPLIER,
-    STORY_MODE_MAZE_SEQUENCE,
-    STORY_MODE_TOTAL_MAZES,
-    PATHFINDER_DURATION,
-    PATHFINDER_MAX_TILES,
-    PATHFINDER_MAX_USES
+    SIMULATION_TICK,
+    MAX_TICKS_PER_FRAME
 )
-from functions import make_maze, astar
+from assets import get_texture, get_flipped_texture
+from functions import merge_wall_rects, choose_cheese_positions
+from hud import Hud, ProfilerOverlay
+from maze_library import get_library
+from maze_prefetch import MazePrefetcher
+from music import get_music
+from sound_effects import get_sound_effects
+from profiler import get_profiler
+from simulation import Simulation
+from sprite_chunks import ChunkedSpriteLayer, split_rect_at_chunks
 from view_manager import GameMode
 
+# Movement keys and the simulation direction each one holds
+MOVEMENT_KEYS = {
+    arcade.key.UP: "up",
+    arcade.key.W: "up",
+    arcade.key.DOWN: "down",
+    arcade.key.S: "down",
+    arcade.key.LEFT: "left",
+    arcade.key.A: "left",
+    arcade.key.RIGHT: "right",
+    arcade.key.D: "right",
+}
+
+# Rasterize rows of tiles into a texture, one pixel per tile
+# Row 0 of the rows is at the bottom of the world but the top of an image, so it is flipped
+def make_tiles_texture(rows, width):
+    tiles = Image.frombytes("P", (width, len(rows)), b"".join(bytes(row) for row in rows))
+    # Palette index 0 is TILE_EMPTY (floor), index 1 is TILE_CRATE (wall)
+    tiles.putpalette(arcade.color.DEEP_SKY_BLUE.rgb + arcade.color.DODGER_BLUE.rgb)
+
+    image = tiles.convert("RGBA").transpose(Image.Transpose.FLIP_TOP_BOTTOM)
+    return arcade.Texture(image, hit_box_algorithm=arcade.hitbox.algo_bounding_box)
+
+# Sprites of one endless maze chunk: its baked floor and walls, and its cheese
+class ChunkSprites:
+
+    def __init__(self, chunk, width):
+        self.texture = make_tiles_texture(chunk.rows, width)
+        self.rect = arcade.LBWH(0, chunk.first_row * SPRITE_SIZE, width * SPRITE_SIZE, len(chunk.rows) * SPRITE_SIZE)
+        self.coin_list = arcade.SpriteList()
+        self.coins = {}  # Tile number -> cheese sprite
+
+        for (row, column) in chunk.cheese_positions:
+            coin = arcade.Sprite(get_texture("images/items/cheese.png"), scale=SPRITE_SCALING)
+            coin.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
+            coin.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
+            self.coin_list.append(coin)
+            self.coins[row * width + column] = coin
+
 # Main application class
+# Gameplay state and rules live in self.simulation; this view draws it and turns input into calls on it
 class GameView(arcade.View):
 
-    def __init__(self, view_manager, game_mode=GameMode.FREE_PLAY, story_mouse_color="white"):
+    # seed: Run seed the mazes are derived from, random if None
+    def __init__(self, view_manager, game_mode=GameMode.FREE_PLAY, story_mouse_color="white", seed=None):
         super().__init__()
 
         self.view_manager = view_manager
 
-        # Load gameplay music
-        self.gameplay_music = arcade.load_sound("sounds/music.mp3")
-        self.music_player = None
-        self.music_is_paused = False
+        # Sound effects (shared, decoded once per process)
+        self.sound_effects = get_sound_effects()
+        self.sound_effects.load()
 
-         # Game mode
-        self.game_mode = game_mode
         self.story_mouse_color = story_mouse_color  # Locked mouse color for story mode
-        
-        # Story mode specific tracking
-        self.story_maze_index = 0  # Current maze in the sequence (0-9)
-        self.total_story_time = 0  # Total time across all story mazes
+
+        # Builds the next maze in the background while the current one is played
+        self.maze_prefetcher = MazePrefetcher()
+
+        # The game itself
+        self.simulation = Simulation(game_mode, self.maze_prefetcher, seed, get_library())
+
+        # Frame time not yet simulated, always less than one tick
+        self.unsimulated_time = 0.0
 
         # Sprite lists
         self.player_list = None
         self.wall_list = None
         self.floor_list = None
         self.path_list = None  
+        self.path_sprites = []  # Red Pathfinder tiles, hidden when not in use
         self.coin_list = None  
         self.exit_list = None 
 
-        # Player info
-        self.player_sprite = None
-        self.score = 0
-        self.grand_total_score = 0  # Cumulative score across all mazes
+        # Pre-rendered floor and walls (BAKE_MAZE_TEXTURE mode)
+        self.maze_texture = None
+        self.maze_rect = None
 
-        # Physics engine
-        self.physics_engine = None
+        # Endless mode: ChunkSprites of every chunk in memory, by chunk index
+        self.chunk_sprites = {}
 
-        # Track the current state of what key is pressed
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
+        self.player_sprite = None
 
         # Create the cameras. One for the GUI, one for the sprites.
         # We scroll the 'sprite world' but not the GUI.
         self.camera_sprites = arcade.Camera2D()
         self.camera_gui = arcade.Camera2D()
 
-        # Elapsed time
-        self.elapsed_time = 0
+        # Score, time and progress readout
+        self.hud = self.create_hud()
 
-        # Completed mazes counter
-        self.completed_mazes = 0
+        # Per-phase timings, shown with F3
+        self.profiler = get_profiler()
+        self.profiler_overlay = None  # Made the first time it is shown, its font is slow to load
 
-        # Best time tracking
-        self.best_time = None
-        
-        # Store initial player position for restart
-        self.initial_player_x = SPRITE_SIZE + SPRITE_SIZE / 2
-        self.initial_player_y = SPRITE_SIZE + SPRITE_SIZE / 2
-        
-        # Pathfinder state
-        self.pathfinder_active = False
-        self.pathfinder_timer = 0.0
+    # Game state read by the other views
+    @property
+    def game_mode(self):
+        return self.simulation.game_mode
+
+    @property
+    def score(self):
+        return self.simulation.score
+
+    @property
+    def grand_total_score(self):
+        return self.simulation.grand_total_score
 
-    # Handle playing background music when the game starts
+    @property
+    def elapsed_time(self):
+        return self.simulation.elapsed_time
+
+    @property
+    def best_time(self):
+        return self.simulation.best_time
+
+    @property
+    def completed_mazes(self):
+        return self.simulation.completed_mazes
+
+    @property
+    def total_story_time(self):
+        return self.simulation.total_story_time
+
+    @property
+    def pathfinder_active(self):
+        return self.simulation.pathfinder_active
+
+    # Start or resume the shared background music when the game is shown
     def on_show_view(self):
-        if self.music_player:
-            if self.music_is_paused:
-                # Resume from pause
-                self.music_player.play()
-                self.music_is_paused = False
-        elif not self.music_player:
-            # First time showing view or player was destroyed - start fresh
-            self.music_player = self.gameplay_music.play(volume=MUSIC_VOLUME_MULTIPLIER * constants.VOLUME_SETTING)
-            self.music_player.push_handlers(on_eos=self.loop_gameplay_music)
-
-    # Handle pausing background music when pause menu or congrats screen shows
+        # Settings may have changed the maze size while this view was hidden
+        self.simulation.prefetch_next_maze()
+        get_music().play()
+
+    # Pause the music when the pause menu or congrats screen shows
     def on_hide_view(self):
-        if self.music_player and self.music_player.playing:
-            self.music_player.pause()
-            self.music_is_paused = True
-
-    # Handle looping the background music
-    def loop_gameplay_music(self):
-        if self.music_player:
-            self.music_player.pop_handlers()
-        self.music_player = self.gameplay_music.play(volume=MUSIC_VOLUME_MULTIPLIER * constants.VOLUME_SETTING)
-        self.music_player.push_handlers(on_eos=self.loop_gameplay_music)
+        get_music().pause()
     
-    # Clear the pathfinder path visualization, preserving the black exit tile
+    # Hide the pathfinder path
     def clear_pathfinder(self):
-        if self.path_list and len(self.path_list) > 0:
-            black_tile = self.path_list[0]  # First tile is always the black exit marker
-            self.path_list = arcade.SpriteList()
-            self.path_list.append(black_tile)
-        self.pathfinder_active = False
-        self.pathfinder_timer = 0.0
+        self.simulation.clear_pathfinder()
+        self.handle_simulation_events()
+
+    # Hide the pathfinder path sprites, leaving the black exit tile
+    def clear_path_sprites(self):
+        for path_sprite in self.path_sprites:
+            path_sprite.visible = False
+    
+    # Create the hidden red tiles the Pathfinder path is shown with, reused for every use
+    def create_path_sprites(self):
+        self.path_sprites = []
+        for _ in range(self.simulation.pathfinder_max_tiles):
+            path_sprite = arcade.Sprite(get_texture("images/tiles/blankTile.png"), scale=SPRITE_SCALING)
+            path_sprite.color = arcade.color.RED
+            path_sprite.visible = False
+            self.path_sprites.append(path_sprite)
+            self.path_list.append(path_sprite)
     
     # Create the black tile marker at the exit position
     def create_exit_black_tile(self):
-        if self.game_mode == GameMode.STORY_MODE:
-            current_maze_size = STORY_MODE_MAZE_SEQUENCE[self.story_maze_index]
-        else:
-            current_maze_size = constants.MAZE_SIZE_SETTING
+        current_maze_size = self.simulation.maze_size
         
-        black_tile = arcade.Sprite("images/tiles/blankTile.png", scale=SPRITE_SCALING)
+        black_tile = arcade.Sprite(get_texture("images/tiles/blankTile.png"), scale=SPRITE_SCALING)
         black_tile.center_x = (current_maze_size - 2) * SPRITE_SIZE + SPRITE_SIZE / 2
         black_tile.center_y = (current_maze_size - 2) * SPRITE_SIZE + SPRITE_SIZE / 2
         black_tile.color = arcade.color.BLACK
@@ -139,10 +196,7 @@ class GameView(arcade.View):
     
     # Return the current maze size based on game mode
     def get_current_maze_size(self):
-        if self.game_mode == GameMode.STORY_MODE:
-            return STORY_MODE_MAZE_SEQUENCE[self.story_maze_index]
-        else:
-            return constants.MAZE_SIZE_SETTING
+        return self.simulation.get_current_maze_size()
     
     # Return the current mouse color based on game mode
     def get_current_mouse_color(self):
@@ -152,54 +206,54 @@ class GameView(arcade.View):
             return constants.MOUSE_COLOR_SETTING
     
     # Create wall sprites from maze grid
-    def create_maze_walls(self, maze, maze_size):
-        if not MERGE_SPRITES:
+    # wall_rects: Merged (column, row, width, height) rectangles, computed here if not given
+    # merge_sprites: Merge walls into larger sprites (defaults to MERGE_SPRITES)
+    def create_maze_walls(self, maze, maze_size, wall_rects=None, merge_sprites=MERGE_SPRITES):
+        if not merge_sprites:
             # Simple method: Each grid location is a sprite
             for row in range(maze_size):
                 for column in range(maze_size):
                     if maze[row][column] == TILE_CRATE:
-                        wall = arcade.Sprite("images/tiles/blankTile.png", scale=SPRITE_SCALING)
+                        wall = arcade.Sprite(get_texture("images/tiles/blankTile.png"), scale=SPRITE_SCALING)
                         wall.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
                         wall.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
                         self.wall_list.append(wall)
         else:
             # Optimized: Merge consecutive walls into larger sprites
-            for row in range(maze_size):
-                column = 0
-                while column < len(maze):
-                    while column < len(maze) and maze[row][column] == TILE_EMPTY:
-                        column += 1
-                    start_column = column
-                    while column < len(maze) and maze[row][column] == TILE_CRATE:
-                        column += 1
-                    end_column = column - 1
-
-                    column_count = end_column - start_column + 1
-                    column_mid = (start_column + end_column) / 2
-                    
-                    wall = arcade.Sprite("images/tiles/blankTile.png", scale=SPRITE_SCALING)
-                    wall.center_x = column_mid * SPRITE_SIZE + SPRITE_SIZE / 2
-                    wall.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
-                    wall.width = SPRITE_SIZE * column_count
-                    wall.color = arcade.color.DODGER_BLUE
-                    self.wall_list.append(wall)
+            if wall_rects is None:
+                wall_rects = merge_wall_rects(maze, maze_size)
+
+            # Walls are split where they cross a culling chunk, so each piece is drawn only with its chunk
+            for (column, row, width, height) in (piece for rect in wall_rects for piece in split_rect_at_chunks(*rect)):
+                wall = arcade.Sprite(get_texture("images/tiles/blankTile.png"), scale=SPRITE_SCALING)
+                wall.center_x = (column + width / 2) * SPRITE_SIZE
+                wall.center_y = (row + height / 2) * SPRITE_SIZE
+                wall.width = SPRITE_SIZE * width
+                wall.height = SPRITE_SIZE * height
+                wall.color = arcade.color.DODGER_BLUE
+                self.wall_list.append(wall)
     
     # Create floor sprites for walkable areas
     def create_maze_floor(self, maze, maze_size):
         for row in range(maze_size):
             for column in range(maze_size):
                 if maze[row][column] == TILE_EMPTY:
-                    floor = arcade.Sprite("images/tiles/blankTile.png", scale=SPRITE_SCALING)
+                    floor = arcade.Sprite(get_texture("images/tiles/blankTile.png"), scale=SPRITE_SCALING)
                     floor.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
                     floor.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
                     floor.color = arcade.color.DEEP_SKY_BLUE
                     self.floor_list.append(floor)
     
+    # Rasterize the floor and walls into one texture, one pixel per tile
+    def bake_maze_texture(self, maze, maze_size):
+        self.maze_texture = make_tiles_texture(maze, maze_size)
+        self.maze_rect = arcade.LBWH(0, 0, maze_size * SPRITE_SIZE, maze_size * SPRITE_SIZE)
+
     # Initialize player sprite with textures
     def setup_player(self, mouse_color):
         mouse_filename = f"images/sprites/{mouse_color}_mouse.png"
-        self.mouse_texture_right = arcade.load_texture(mouse_filename)
-        self.mouse_texture_left = self.mouse_texture_right.flip_left_right()
+        self.mouse_texture_right = get_texture(mouse_filename)
+        self.mouse_texture_left = get_flipped_texture(mouse_filename)
         
         self.player_sprite = arcade.Sprite(scale=SPRITE_SCALING)
         self.player_sprite.textures = [self.mouse_texture_left, self.mouse_texture_right]
@@ -210,312 +264,287 @@ class GameView(arcade.View):
         self.player_sprite.center_x = SPRITE_SIZE + SPRITE_SIZE / 2
         self.player_sprite.center_y = SPRITE_SIZE + SPRITE_SIZE / 2
     
-    # Place cheese randomly in walkable maze areas
-    def place_cheese(self, maze, maze_size):
-        player_pos = (1, 1)
-        exit_pos = (maze_size - 2, maze_size - 2)
-        
-        for row in range(1, maze_size - 1):
-            for column in range(1, maze_size - 1):
-                # Check if tile is empty, not player/exit position, and random chance
-                if (maze[row][column] == TILE_EMPTY and 
-                    (row, column) != player_pos and 
-                    (row, column) != exit_pos and 
-                    random.random() < 0.08):  # 8% chance to place a coin
-                    coin = arcade.Sprite("images/items/cheese.png", scale=SPRITE_SCALING)
-                    coin.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
-                    coin.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
-                    self.coin_list.append(coin)
+    # Create cheese sprites, in the same order as the positions
+    # cheese_positions: Precomputed (row, column) tiles, chosen randomly if not given
+    def place_cheese(self, maze, maze_size, cheese_positions=None):
+        if cheese_positions is None:
+            cheese_positions = choose_cheese_positions(maze, maze_size)
+
+        for (row, column) in cheese_positions:
+            coin = arcade.Sprite(get_texture("images/items/cheese.png"), scale=SPRITE_SCALING)
+            coin.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
+            coin.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
+            self.coin_list.append(coin)
 
     # Restart the current maze without regenerating it
     # deduct_score: If True, deduct collected coins from grand total (for mid-game restart).
                   # If False, keep grand total intact (for replay after completion).
     def restart_maze(self, deduct_score=True):
-        # Deduct collected coins from grand total only if mid-game restart
-        if deduct_score:
-            self.grand_total_score -= self.score
-        
-        # Reset current maze score
-        self.score = 0
-        
-        # Reset elapsed time
-        self.elapsed_time = 0
-        
-        # Restore all coins to the maze
-        for coin in self.coin_list:
-            coin.visible = True
-        
-        # Reset player position to spawn point
-        self.player_sprite.center_x = self.initial_player_x
-        self.player_sprite.center_y = self.initial_player_y
-        
-        # Stop player movement
-        self.player_sprite.change_x = 0
-        self.player_sprite.change_y = 0
-        self.left_pressed = False
-        self.right_pressed = False
-        self.up_pressed = False
-        self.down_pressed = False
-        
-        # Clear pathfinder visualization
-        self.clear_pathfinder()
+        self.simulation.restart_maze(deduct_score)
+        self.handle_simulation_events()
+        self.sync_player_sprite()
         
         # Reset camera to player
         self.camera_sprites.position = (self.player_sprite.center_x, self.player_sprite.center_y)
 
+    # Record the completed maze and move on to a new one
+    def advance_to_next_maze(self):
+        self.simulation.advance_to_next_maze()
+        self.handle_simulation_events()
+
     # Set up the game and initialize the variables
     def setup(self):
-        # Initialize sprite lists
+        self.camera_sprites.zoom = CAMERA_ZOOM
+
+        # Set background color
+        self.background_color = arcade.color.TEAL
+
+        with self.profiler.phase("setup"):
+            self.simulation.start_maze()
+            self.handle_simulation_events()
+
+    # Build all sprites for the maze the simulation just started
+    def create_maze_sprites(self):
+        # Initialize sprite lists (the large static layers are chunked, and only drawn where on screen)
         self.player_list = arcade.SpriteList()
-        self.wall_list = arcade.SpriteList()
-        self.floor_list = arcade.SpriteList()
+        self.wall_list = ChunkedSpriteLayer()
+        self.floor_list = ChunkedSpriteLayer()
         self.path_list = arcade.SpriteList()  
-        self.coin_list = arcade.SpriteList()  
+        self.coin_list = ChunkedSpriteLayer()  
         self.exit_list = arcade.SpriteList() 
-
-        self.score = 0
-        self.camera_sprites.zoom = CAMERA_ZOOM
-
-        # Get current configuration
-        current_maze_size = self.get_current_maze_size()
-        mouse_color = self.get_current_mouse_color()
-
-        # Load sound effects
-        self.coin_sound = arcade.Sound("sounds/collect.wav")
-        self.pathfinder_sound = arcade.Sound("sounds/pathfinder.wav")
-        self.exit_sound = arcade.Sound("sounds/exit.wav")
-
-        # Initialize pathfinder variables
-        self.pathfinder_uses_remaining = PATHFINDER_MAX_USES
-        self.pathfinder_max_uses = PATHFINDER_MAX_USES
-        self.pathfinder_active = False
-        self.pathfinder_timer = 0.0
-        self.pathfinder_duration = PATHFINDER_DURATION
-        self.pathfinder_max_tiles = PATHFINDER_MAX_TILES
-        
-        # Generate maze
-        maze = make_maze(current_maze_size, current_maze_size)
-        self.maze = maze
+        self.path_sprites = []
+        self.chunk_sprites = {}
+
+        if self.game_mode == GameMode.ENDLESS:
+            # Endless chunks are always baked, one texture each, and come and go as the player climbs
+            for chunk in self.simulation.maze.chunks.values():
+                self.add_chunk_sprites(chunk)
+            self.setup_player(self.get_current_mouse_color())
+            return
+
+        layout = self.simulation.layout
+        maze = layout.maze
+        current_maze_size = self.simulation.maze_size
         
         # Create maze sprites
-        self.create_maze_walls(maze, current_maze_size)
-        self.create_maze_floor(maze, current_maze_size)
+        if BAKE_MAZE_TEXTURE:
+            with self.profiler.phase("bake maze"):
+                self.bake_maze_texture(maze, current_maze_size)
+        else:
+            with self.profiler.phase("wall sprites"):
+                self.create_maze_walls(maze, current_maze_size, layout.wall_rects)
+            with self.profiler.phase("floor sprites"):
+                self.create_maze_floor(maze, current_maze_size)
         
         # Setup player
-        self.setup_player(mouse_color)
+        self.setup_player(self.get_current_mouse_color())
         
-        # Create exit marker and sign
+        # Create exit marker, Pathfinder tiles and sign
         self.create_exit_black_tile()
-        exit_sprite = arcade.Sprite("images/tiles/exitSign.png", scale=SPRITE_SCALING)
+        self.create_path_sprites()
+        exit_sprite = arcade.Sprite(get_texture("images/tiles/exitSign.png"), scale=SPRITE_SCALING)
         exit_sprite.center_x = (current_maze_size - 2) * SPRITE_SIZE + SPRITE_SIZE / 2
         exit_sprite.center_y = (current_maze_size - 2) * SPRITE_SIZE + SPRITE_SIZE / 2
         self.exit_list.append(exit_sprite)
         
-        # Setup physics
-        self.physics_engine = arcade.PhysicsEngineSimple(self.player_sprite, self.wall_list)
-        
-        # Set background color
-        self.background_color = arcade.color.TEAL
-        
         # Place coins
-        self.place_cheese(maze, current_maze_size)
-        
-        # Start music if not playing
-        if not self.music_player:
-            self.music_player = self.gameplay_music.play(volume=MUSIC_VOLUME_MULTIPLIER * constants.VOLUME_SETTING)
-            self.music_player.push_handlers(on_eos=self.loop_gameplay_music)
+        with self.profiler.phase("cheese sprites"):
+            self.place_cheese(maze, current_maze_size, layout.cheese_positions)
+
+    # Build the sprites of an endless maze chunk
+    def add_chunk_sprites(self, chunk):
+        self.chunk_sprites[chunk.index] = ChunkSprites(chunk, self.simulation.maze_size)
+
+    # React to everything the simulation did since the last call, then update the HUD
+    # delta_time: Frame time, for throttling the HUD's time readout
+    def handle_simulation_events(self, delta_time=0.0):
+        for event in self.simulation.take_events():
+            name = event[0]
+            if name == "maze_started":
+                with self.profiler.phase("maze sprites"):
+                    self.create_maze_sprites()
+            elif name == "cheese_collected":
+                if self.game_mode == GameMode.ENDLESS:
+                    row = event[1] // self.simulation.maze_size
+                    sprites = self.chunk_sprites[self.simulation.maze.chunk_index(row)]
+                    sprites.coins.pop(event[1]).remove_from_sprite_lists()
+                else:
+                    self.coin_list[event[1]].visible = False
+                self.sound_effects.play("collect")
+            elif name == "cheese_restored":
+                for index in event[1]:
+                    self.coin_list[index].visible = True
+            elif name == "pathfinder_shown":
+                self.pathfinder(event[1])
+                self.sound_effects.play("pathfinder")
+            elif name == "pathfinder_cleared":
+                self.clear_path_sprites()
+            elif name == "exit_reached":
+                self.sound_effects.play("exit")
+            elif name == "maze_completed":
+                # Free play mode - show congratulations
+                self.view_manager.show_congratulations(self)
+            elif name == "story_complete":
+                # Story complete! Show victory screen
+                self.view_manager.show_story_victory(self)
+            elif name == "chunk_loaded":
+                self.add_chunk_sprites(event[1])
+            elif name == "chunk_evicted":
+                # Dropping the last reference frees the chunk's texture from the atlas
+                del self.chunk_sprites[event[1]]
+
+        with self.profiler.phase("hud update"):
+            self.update_hud(delta_time)
+
+    # Move the player sprite to the simulated player and face it the way it is moving
+    def sync_player_sprite(self):
+        player = self.simulation.player
+        self.player_sprite.center_x = player.center_x
+        self.player_sprite.center_y = player.center_y
+
+        if player.change_x < 0:
+            self.player_sprite.texture = self.player_sprite.textures[0]  # Face left
+        elif player.change_x > 0:
+            self.player_sprite.texture = self.player_sprite.textures[1]  # Face right
+
+    # Return the profiler overlay, making it the first time it is needed
+    # The profiler is shared, so it can already be on when this view starts
+    def get_profiler_overlay(self):
+        if self.profiler_overlay is None:
+            self.profiler_overlay = ProfilerOverlay(self.profiler)
+        return self.profiler_overlay
 
     # Render the screen
     def on_draw(self):
+        profiler = self.profiler
+        with profiler.phase("draw"):
+
+            # This command has to happen before we start drawing
+            self.clear()
+
+            # Select the sprite camera for the game world
+            self.camera_sprites.use()
+
+            # Draw the static maze, as a single quad when it is baked
+            with profiler.phase("draw maze"):
+                if self.game_mode == GameMode.ENDLESS:
+                    # One quad and one cheese list per chunk in memory
+                    for sprites in self.chunk_sprites.values():
+                        arcade.draw_texture_rect(sprites.texture, sprites.rect, blend=False, pixelated=True)
+                        sprites.coin_list.draw()
+                elif BAKE_MAZE_TEXTURE:
+                    arcade.draw_texture_rect(self.maze_texture, self.maze_rect, blend=False, pixelated=True)
+                else:
+                    self.floor_list.draw(self.camera_sprites)
+                    self.wall_list.draw(self.camera_sprites)
+
+            # Draw the dynamic sprites
+            with profiler.phase("draw sprites"):
+                self.path_list.draw()
+                self.coin_list.draw(self.camera_sprites)
+                self.exit_list.draw()
+                self.player_list.draw()
+
+            # Select the GUI camera for the HUD
+            self.camera_gui.use()
+
+            # Draw the HUD
+            with profiler.phase("draw hud"):
+                self.hud.draw()
+
+        # The overlay is drawn outside the phases it reports on
+        if profiler.enabled:
+            self.get_profiler_overlay().draw()
+        profiler.end_frame()
+
+    # Create the HUD lines (score, time, completed mazes, grand total)
+    def create_hud(self):
+        hud = Hud()
+        hud.add_line("grand_total_score", "Total Cheese: {}", arcade.color.YELLOW)
+        hud.add_line("score", "Cheese: {}")
+        hud.add_line("elapsed_time", "Time: {:.3f} s")
+        hud.add_line("completed_mazes", "Completed: {}")
+        hud.add_line("maze_size", "Maze Size: {}")
+        hud.add_line("pathfinder", "Pathfinder: {0[0]}/{0[1]}", arcade.color.LIGHT_BLUE, bold=True)
+        if self.game_mode == GameMode.ENDLESS:
+            # Show how high the player has climbed instead of the distance to an exit
+            hud.add_line("height", "Height: {} tiles")
+        else:
+            hud.add_line("exit_distance", "Exit: {} tiles")
+        return hud
+
+    # Bring the HUD up to date with the simulation
+    # delta_time: Time since the last update, for throttling the time readout
+    def update_hud(self, delta_time=0.0):
+        simulation = self.simulation
+        hud = self.hud
+        hud.set("grand_total_score", simulation.grand_total_score)
+        hud.set("score", simulation.score)
+        hud.set_time("elapsed_time", simulation.elapsed_time, delta_time)
+        hud.set("completed_mazes", simulation.completed_mazes)
 
-        # This command has to happen before we start drawing
-        self.clear()
-
-        # Select the sprite camera for the game world
-        self.camera_sprites.use()
-
-        # Draw all the sprites
-        self.floor_list.draw()
-        self.wall_list.draw()
-        self.path_list.draw()
-        self.coin_list.draw()
-        self.exit_list.draw()
-        self.player_list.draw()
-
-        # Select the GUI camera for the HUD
-        self.camera_gui.use()
-
-        # Draw the HUD (score, time, completed mazes, grand total)
-        output = f"Total Cheese: {self.grand_total_score}"
-        arcade.draw_text(output, 20, WINDOW_HEIGHT - 20, arcade.color.YELLOW, 16)
-
-        output = f"Cheese: {self.score}"
-        arcade.draw_text(output, 20, WINDOW_HEIGHT - 40, arcade.color.WHITE, 16)
-
-        output = f"Time: {self.elapsed_time:.3f} s"
-        arcade.draw_text(output, 20, WINDOW_HEIGHT - 60, arcade.color.WHITE, 16)
-
-        output = f"Completed: {self.completed_mazes}"
-        arcade.draw_text(output, 20, WINDOW_HEIGHT - 80, arcade.color.WHITE, 16)
-        
         # Show maze size for current maze
-        current_size = self.get_current_maze_size()
-        size_name = "Small" if current_size == 21 else "Medium" if current_size == 31 else "Large"
-        output = f"Maze Size: {size_name}"
-        arcade.draw_text(output, 20, WINDOW_HEIGHT - 100, arcade.color.WHITE, 16)
-
-        # Draw pathfinder uses remaining
-        output = f"Pathfinder: {self.pathfinder_uses_remaining}/{self.pathfinder_max_uses}"
-        arcade.draw_text(output, 20, WINDOW_HEIGHT - 120, arcade.color.LIGHT_BLUE, 16, bold=True)
-
-    # Calculate speed based on the keys pressed
-    def update_player_speed(self):
-        self.player_sprite.change_x = 0
-        self.player_sprite.change_y = 0
-
-        if self.up_pressed and not self.down_pressed:
-            self.player_sprite.change_y = MOVEMENT_SPEED
-        elif self.down_pressed and not self.up_pressed:
-            self.player_sprite.change_y = -MOVEMENT_SPEED
-        if self.left_pressed and not self.right_pressed:
-            self.player_sprite.change_x = -MOVEMENT_SPEED
-        elif self.right_pressed and not self.left_pressed:
-            self.player_sprite.change_x = MOVEMENT_SPEED
-
-        # Normalize diagonal movement so speed is consistent in all directions
-        if self.player_sprite.change_x != 0 and self.player_sprite.change_y != 0:
-            # Moving diagonally, so normalize to maintain constant speed
-            self.player_sprite.change_x *= DIAGONAL_MOVEMENT_FACTOR
-            self.player_sprite.change_y *= DIAGONAL_MOVEMENT_FACTOR
-        
-        # Update sprite direction based on horizontal movement
-        if self.player_sprite.change_x < 0:
-            self.player_sprite.texture = self.player_sprite.textures[0]  # Face left
-        elif self.player_sprite.change_x > 0:
-            self.player_sprite.texture = self.player_sprite.textures[1]  # Face right
+        current_size = simulation.maze_size
+        if self.game_mode == GameMode.ENDLESS:
+            hud.set("maze_size", "Endless")
+            hud.set("height", simulation.get_height())
+        else:
+            hud.set("maze_size", "Small" if current_size == 21 else "Medium" if current_size == 31 else "Large")
+            hud.set("exit_distance", simulation.get_exit_distance())
+
+        # Pathfinder uses remaining
+        hud.set("pathfinder", (simulation.pathfinder_uses_remaining, simulation.pathfinder_max_uses))
 
     # Called whenever a key is pressed
     def on_key_press(self, key, modifiers):
         if key in (arcade.key.ENTER, arcade.key.ESCAPE):
             self.view_manager.show_in_game_menu(self)
+        elif key == arcade.key.F3:
+            # Show or hide the frame profiler overlay
+            self.profiler.toggle()
         elif key == arcade.key.R:
             # Restart current maze (preserves maze layout)
             self.restart_maze()
 
         # Pathfinder
         elif key == arcade.key.SPACE:
-            # Check if player has uses remaining
-            if self.pathfinder_uses_remaining > 0:
-                # Clear any existing path first
-                self.clear_pathfinder()
-                # Restore black tile after clearing
-                if len(self.path_list) == 0:
-                    self.create_exit_black_tile()
-                
-                # Show pathfinder path
-                self.pathfinder(self.maze)
-                
-                # Consume a use and start timer
-                self.pathfinder_uses_remaining -= 1
-                self.pathfinder_active = True
-                self.pathfinder_timer = 0.0
-                self.pathfinder_sound.play(volume=SOUND_VOLUME_MULTIPLIER * constants.VOLUME_SETTING, pan=0.0)
-
-
-        elif key in (arcade.key.UP, arcade.key.W):
-            self.up_pressed = True
-            self.update_player_speed()
-        elif key in (arcade.key.DOWN, arcade.key.S):
-            self.down_pressed = True
-            self.update_player_speed()
-        elif key in (arcade.key.LEFT, arcade.key.A):
-            self.left_pressed = True
-            self.update_player_speed()
-        elif key in (arcade.key.RIGHT, arcade.key.D):
-            self.right_pressed = True
-            self.update_player_speed()
+            self.simulation.use_pathfinder()
+            self.handle_simulation_events()
+
+        elif key in MOVEMENT_KEYS:
+            self.simulation.set_direction(MOVEMENT_KEYS[key], True)
+            self.sync_player_sprite()
 
     # Called when the user releases a key (important for movement)
     def on_key_release(self, key, modifiers):
-        if key in (arcade.key.UP, arcade.key.W):
-            self.up_pressed = False
-            self.update_player_speed()
-        elif key in (arcade.key.DOWN, arcade.key.S):
-            self.down_pressed = False
-            self.update_player_speed()
-        elif key in (arcade.key.LEFT, arcade.key.A):
-            self.left_pressed = False
-            self.update_player_speed()
-        elif key in (arcade.key.RIGHT, arcade.key.D):
-            self.right_pressed = False
-            self.update_player_speed()
+        if key in MOVEMENT_KEYS:
+            self.simulation.set_direction(MOVEMENT_KEYS[key], False)
+            self.sync_player_sprite()
 
     # Movement and game logic
+    # The simulation advances in fixed ticks, so a run depends only on its inputs and the ticks
+    # they arrived on, never on the frame rate
     def on_update(self, delta_time):
-
-        # Call update on all sprites
-        self.physics_engine.update()
-
-        # Check for collisions between the player and coins
-        coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite, self.coin_list)
-        for coin in coin_hit_list:
-            if coin.visible:  # Only collect visible coins
-                coin.visible = False
-                self.score += 1
-                self.grand_total_score += 1
-                self.coin_sound.play(volume=SOUND_VOLUME_MULTIPLIER * constants.VOLUME_SETTING)
-
-        # Check if player reached the exit (player must be fully on the exit tile)
-        exit_sprite = self.exit_list[0]
-        
-        # Check if player center is within the exit tile boundaries
-        exit_tile_left = exit_sprite.center_x - SPRITE_SIZE / 2
-        exit_tile_right = exit_sprite.center_x + SPRITE_SIZE / 2
-        exit_tile_bottom = exit_sprite.center_y - SPRITE_SIZE / 2
-        exit_tile_top = exit_sprite.center_y + SPRITE_SIZE / 2
-        
-        # Player must be fully contained within the exit tile
-        if (self.player_sprite.center_x > exit_tile_left and 
-            self.player_sprite.center_x < exit_tile_right and
-            self.player_sprite.center_y > exit_tile_bottom and 
-            self.player_sprite.center_y < exit_tile_top):
-
-            self.exit_sound.play(volume=SOUND_VOLUME_MULTIPLIER * constants.VOLUME_SETTING)
-
-            if self.game_mode == GameMode.STORY_MODE:
-                # Track total time across all mazes
-                self.total_story_time += self.elapsed_time
-                
-                # Check if this was the last maze
-                if self.story_maze_index >= STORY_MODE_TOTAL_MAZES - 1:
-                    # Story complete! Show victory screen
-                    self.view_manager.show_story_victory(self)
-                else:
-                    # Move to next maze in story
-                    self.story_maze_index += 1
-                    self.elapsed_time = 0
-                    self.completed_mazes += 1
-                    self.setup()  # Generate next maze
-                    # Note: No congratulations screen in story mode, seamless transition
-            else:
-                # Free play mode - show congratulations
-                self.view_manager.show_congratulations(self)
-
-        # Update the elapsed time
-        self.elapsed_time += delta_time
-
-        # Update pathfinder timer - auto-hide after duration
-        if self.pathfinder_active:
-            self.pathfinder_timer += delta_time
-            if self.pathfinder_timer >= self.pathfinder_duration:
-                # Time's up - clear the path
-                self.clear_pathfinder()
-                # Restore black tile
-                if len(self.path_list) == 0:
-                    self.create_exit_black_tile()
-
-        # Scroll the screen to the player
-        self.scroll_to_player()
+        profiler = self.profiler
+        with profiler.phase("update"):
+            self.unsimulated_time += delta_time
+            ticks = int(self.unsimulated_time / SIMULATION_TICK)
+            self.unsimulated_time -= ticks * SIMULATION_TICK
+            with profiler.phase("simulation"):
+                for _ in range(min(ticks, MAX_TICKS_PER_FRAME)):
+                    self.simulation.step(SIMULATION_TICK)
+                if self.game_mode == GameMode.ENDLESS:
+                    self.generate_rows_in_view()
+            with profiler.phase("events"):
+                self.handle_simulation_events(delta_time)
+            self.sync_player_sprite()
+
+            # Scroll the screen to the player
+            with profiler.phase("scroll"):
+                self.scroll_to_player()
+
+        if profiler.enabled:
+            self.get_profiler_overlay().update(delta_time)
 
     #  Scroll the window to the player.
         # if CAMERA_SPEED is 1, the camera will immediately move to the desired
@@ -526,32 +555,19 @@ class GameView(arcade.View):
         self.camera_sprites.position = arcade.math.lerp_2d(
             self.camera_sprites.position, position, CAMERA_SPEED
         )
-    
-    # Pathfinder function to draw a path with tiles from the players position to the exit
-    # utilizes A* 
-    def pathfinder(self, maze):
-        # Convert player position from pixels to grid coordinates
-        player_grid_x = int(self.player_sprite.center_x / SPRITE_SIZE)
-        player_grid_y = int(self.player_sprite.center_y / SPRITE_SIZE)
-
-        # Determine current maze size
-        current_maze_size = self.get_current_maze_size()
-        
-        # A* expects (row, column) which is (y, x)
-        start = (player_grid_y, player_grid_x)
-        goal = (current_maze_size - 2, current_maze_size - 2)
-        
-        path = astar(maze, start, goal)
-        
-        if path:
-            # Limit to first N tiles of the path (path is reversed: goal to start)
-            # Use last N elements to get tiles closest to player
-            limited_path = path[-self.pathfinder_max_tiles:] if len(path) > self.pathfinder_max_tiles else path
-            
-            for (row, column) in limited_path:
-                path_sprite = arcade.Sprite("images/tiles/blankTile.png", scale=SPRITE_SCALING)
-                # Convert grid coordinates back to pixel coordinates
-                path_sprite.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
-                path_sprite.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
-                path_sprite.color = arcade.color.RED
-                self.path_list.append(path_sprite)
\ No newline at end of file
+
+    # Generate endless maze chunks before they scroll into view, using where scroll_to_player
+    # will put the camera this frame; their events are handled with the rest of the frame's
+    def generate_rows_in_view(self):
+        player = self.simulation.player
+        camera_y = arcade.math.lerp(self.camera_sprites.position[1], player.center_y, CAMERA_SPEED)
+        view_top = camera_y + WINDOW_HEIGHT / 2 / self.camera_sprites.zoom
+        self.simulation.generate_endless_rows(int(view_top / SPRITE_SIZE) + 1)
+
+    # Draw the Pathfinder path with red tiles
+    def pathfinder(self, tiles):
+        for path_sprite, (row, column) in zip(self.path_sprites, tiles):
+            # Convert grid coordinates back to pixel coordinates
+            path_sprite.center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
+            path_sprite.center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
+            path_sprite.visible = True
@@ -0,0 +1,104 @@
+# GRID PHYSICS - Moves the player through the maze grid instead of checking every wall sprite
+
+import math
+from constants import SPRITE_SIZE, TILE_CRATE
+
+# Physics engine that resolves the player's hit box against only the maze tiles it touches.
+# Each frame costs the same no matter how large the maze is, and movement is swept tile
+# by tile so fast movement cannot tunnel through walls.
+# Like arcade.PhysicsEngineSimple it moves along y first and then x, so the player slides
+# along walls, and a blocked vertical move stops vertical speed until the keys change.
+class GridPhysicsEngine:
+
+    def __init__(self, player_sprite, maze, tile_size=SPRITE_SIZE):
+        self.player_sprite = player_sprite
+        self.tile_size = tile_size
+        self.rows = len(maze)
+        self.columns = len(maze[0])
+        self.tiles = b"".join(bytes(row) for row in maze)
+
+    # Return True if the tile blocks movement (everything outside the maze does)
+    def is_blocked(self, row, column):
+        if 0 <= row < self.rows and 0 <= column < self.columns:
+            return self.tiles[row * self.columns + column] == TILE_CRATE
+        return True
+
+    # Return True if any tile in the given column between the two rows blocks movement
+    def column_blocked(self, column, first_row, last_row):
+        for row in range(first_row, last_row + 1):
+            if self.is_blocked(row, column):
+                return True
+        return False
+
+    # Return True if any tile in the given row between the two columns blocks movement
+    def row_blocked(self, row, first_column, last_column):
+        for column in range(first_column, last_column + 1):
+            if self.is_blocked(row, column):
+                return True
+        return False
+
+    # Move a span [low, high) by delta along one axis, stopping at the first blocked line of tiles
+    # blocked(index) tells whether the line of tiles at that index blocks the span
+    # Returns (distance moved, whether movement was blocked)
+    def sweep(self, low, high, delta, blocked):
+        size = self.tile_size
+        if delta > 0:
+            # Lines of tiles the leading edge enters, nearest first
+            for index in range(math.ceil(high / size), math.ceil((high + delta) / size)):
+                if blocked(index):
+                    return index * size - high, True
+        else:
+            for index in range(math.floor(low / size) - 1, math.floor((low + delta) / size) - 1, -1):
+                if blocked(index):
+                    return (index + 1) * size - low, True
+        return delta, False
+
+    # Rows of tiles covered by a vertical span [bottom, top)
+    def row_range(self, bottom, top):
+        return math.floor(bottom / self.tile_size), math.ceil(top / self.tile_size) - 1
+
+    # Columns of tiles covered by a horizontal span [left, right)
+    def column_range(self, left, right):
+        return math.floor(left / self.tile_size), math.ceil(right / self.tile_size) - 1
+
+    # Move the player one frame, returning True if a wall stopped it
+    def update(self):
+        sprite = self.player_sprite
+        hit = False
+
+        # --- Move in the y direction
+        if sprite.change_y:
+            first_column, last_column = self.column_range(sprite.left, sprite.right)
+            moved, blocked = self.sweep(
+                sprite.bottom, sprite.top, sprite.change_y,
+                lambda row: self.row_blocked(row, first_column, last_column)
+            )
+            sprite.center_y += moved
+            if blocked:
+                sprite.change_y = 0
+                hit = True
+
+        # --- Move in the x direction
+        if sprite.change_x:
+            first_row, last_row = self.row_range(sprite.bottom, sprite.top)
+            moved, blocked = self.sweep(
+                sprite.left, sprite.right, sprite.change_x,
+                lambda column: self.column_blocked(column, first_row, last_row)
+            )
+            sprite.center_x += moved
+            hit = hit or blocked
+
+        return hit
+
+# Grid physics for a maze that changes while it is played, such as the endless maze
+# The maze is asked about every tile instead of being copied up front
+class StreamingGridPhysicsEngine(GridPhysicsEngine):
+
+    def __init__(self, player_sprite, maze, tile_size=SPRITE_SIZE):
+        self.player_sprite = player_sprite
+        self.tile_size = tile_size
+        self.maze = maze
+
+    # Return True if the tile blocks movement
+    def is_blocked(self, row, column):
+        return self.maze.is_blocked(row, column)
@@ -0,0 +1,98 @@
+# HUD - Heads-up display built from persistent text objects drawn as one batch
+
+import string
+import arcade
+from pyglet.graphics import Batch
+from constants import (
+    HUD_FONT_SIZE,
+    HUD_LEFT,
+    HUD_LINE_HEIGHT,
+    HUD_TIME_REFRESH_RATE,
+    PROFILER_OVERLAY_REFRESH_RATE,
+    PROFILER_OVERLAY_WIDTH,
+    WINDOW_WIDTH,
+    WINDOW_HEIGHT
+)
+
+# Characters the HUD shows, rendered ahead of time by warm_up_fonts()
+HUD_CHARACTERS = string.ascii_letters + string.digits + " :./"
+
+# Render the HUD's glyphs once, so the first game doesn't wait for its font to load
+# Run it on the main thread: glyphs are uploaded to GL textures
+def warm_up_fonts():
+    for bold in (False, True):
+        arcade.Text(HUD_CHARACTERS, 0, 0, font_size=HUD_FONT_SIZE, bold=bold)
+
+# A column of text lines in the top left corner. Each line is an arcade.Text made once and
+# only re-laid-out when the value it shows changes; the time line is refreshed at most
+# time_refresh_rate times per second. All lines share one batch, so drawing is a single call.
+class Hud:
+
+    def __init__(self, time_refresh_rate=HUD_TIME_REFRESH_RATE):
+        self.batch = Batch()
+        self.labels = {}  # name -> arcade.Text
+        self.templates = {}  # name -> format string for the value
+        self.values = {}  # name -> value currently shown
+        self.time_refresh_interval = 1 / time_refresh_rate
+        self.time_since_refresh = 0.0
+
+    # Add a line below the existing ones
+    # template: Format string the value is put into, such as "Cheese: {}"
+    def add_line(self, name, template, color=arcade.color.WHITE, bold=False):
+        y = WINDOW_HEIGHT - HUD_LINE_HEIGHT * (len(self.labels) + 1)
+        self.labels[name] = arcade.Text("", HUD_LEFT, y, color, HUD_FONT_SIZE, bold=bold, batch=self.batch)
+        self.templates[name] = template
+        self.values[name] = None
+
+    # Show a value on a line, re-laying-out the text only if the value changed
+    def set(self, name, value):
+        if self.values[name] != value:
+            self.values[name] = value
+            self.labels[name].text = self.templates[name].format(value)
+
+    # Show a time on a line, at most time_refresh_rate times per second
+    # A time that went down (a restart or a new maze) is always shown straight away
+    def set_time(self, name, seconds, delta_time):
+        self.time_since_refresh += delta_time
+        shown = self.values[name]
+        if shown is None or seconds < shown or self.time_since_refresh >= self.time_refresh_interval:
+            self.time_since_refresh = 0.0
+            self.set(name, seconds)
+
+    # Draw every line
+    def draw(self):
+        self.batch.draw()
+
+# The profiler's per-phase p50/p99 frame timings in the top right corner
+# Refreshed PROFILER_OVERLAY_REFRESH_RATE times per second; a line is added the first time a phase runs.
+class ProfilerOverlay:
+
+    def __init__(self, profiler, refresh_rate=PROFILER_OVERLAY_REFRESH_RATE):
+        self.profiler = profiler
+        self.batch = Batch()
+        self.left = WINDOW_WIDTH - PROFILER_OVERLAY_WIDTH
+        self.labels = [self.make_label(0, "Phase            p50     p99 ms", arcade.color.LIGHT_GREEN)]
+        self.refresh_interval = 1 / refresh_rate
+        self.time_since_refresh = self.refresh_interval
+
+    # Make the text of a line, counting lines down from the top
+    def make_label(self, line, text, color=arcade.color.WHITE):
+        y = WINDOW_HEIGHT - HUD_LINE_HEIGHT * (line + 1)
+        return arcade.Text(text, self.left, y, color, HUD_FONT_SIZE * 3 // 4, font_name="Courier New", batch=self.batch)
+
+    # Show the latest percentiles if it is time to
+    def update(self, delta_time):
+        self.time_since_refresh += delta_time
+        if self.time_since_refresh < self.refresh_interval:
+            return
+        self.time_since_refresh = 0.0
+        for index, (name, p50, p99) in enumerate(self.profiler.percentiles(), start=1):
+            if index == len(self.labels):
+                self.labels.append(self.make_label(index, ""))
+            text = f"{name:<15}{p50 * 1000:>6.2f}  {p99 * 1000:>6.2f}"
+            if self.labels[index].text != text:
+                self.labels[index].text = text
+
+    # Draw every line
+    def draw(self):
+        self.batch.draw()
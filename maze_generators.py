@@ -0,0 +1,269 @@
+# MAZE GENERATORS - Interchangeable maze generation algorithms, looked up by name
+#
+# Every generator fills the same flat grid as functions.make_maze_grid: one byte per tile, row
+# by row, with cells on odd row/column combinations and walls everywhere else. A generator
+# only decides which walls between neighboring cells to knock down, so every maze it makes is
+# a perfect maze (exactly one path between any two cells) and works with the rest of the game.
+#
+#   generate_maze(51, 51, rng, "kruskal")
+
+import random
+import numpy as np
+from array import array
+from constants import TILE_EMPTY, TILE_CRATE, MAZE_ELLER_JOIN_CHANCE, MAZE_ELLER_UP_CHANCE, MAZE_WALK_BATCH
+from functions import TILE_UNVISITED, create_grid_with_cells, grid_rows, make_maze_grid
+
+# Marker for cells Prim's algorithm can grow into next (bit 1 set, like TILE_UNVISITED)
+TILE_FRONTIER = 3
+
+# The generator mazes are made with unless another one is chosen (and the maze library uses)
+DEFAULT_GENERATOR = "dfs"
+
+# Registered generators by name: (label for the settings menu, function(width, height, rng) -> flat grid)
+GENERATORS = {}
+
+# Add a maze generator under a name
+def register_generator(name, label, make_grid):
+    GENERATORS[name] = (label, make_grid)
+
+# Return the flat grid function of a generator
+def get_generator(name):
+    try:
+        return GENERATORS[name][1]
+    except KeyError:
+        raise ValueError(f"Unknown maze generator {name!r}") from None
+
+# Create a maze with a generator, as a list of rows indexed as maze[row][column]
+def generate_maze(maze_width, maze_height, rng=random, generator=DEFAULT_GENERATOR):
+    return grid_rows(get_generator(generator)(maze_width, maze_height, rng), maze_width)
+
+# Return a NumPy random generator seeded from a random.Random, so NumPy steps follow the maze seed
+def numpy_rng(rng):
+    return np.random.default_rng(rng.getrandbits(64))
+
+# Return the tile index of every cell of a grid, as a (cell rows, cell columns) array
+def cell_tiles(maze_width, cell_rows, cell_columns):
+    rows = np.arange(cell_rows, dtype=np.int64) * (2 * maze_width) + maze_width
+    columns = np.arange(cell_columns, dtype=np.int64) * 2 + 1
+    return rows[:, None] + columns[None, :]
+
+# Knock down the walls between pairs of neighboring cells, given as tile index arrays
+def carve_passages(grid, first_tiles, second_tiles):
+    tiles = np.frombuffer(grid, dtype=np.uint8)
+    tiles[(first_tiles + second_tiles) // 2] = TILE_EMPTY
+
+# Add a wall row past the end of a grid, so neighbor lookups two tiles away never go out of
+# bounds (see make_maze_grid), and return the unpadded size to cut the grid back to afterwards
+def pad_grid(grid, maze_width):
+    size = len(grid)
+    grid += bytes([TILE_CRATE]) * maze_width
+    return size
+
+# Kruskal's algorithm: go through every wall between cells in random order and knock it down
+# if the cells on either side aren't connected yet (tracked with a union-find forest).
+# Listing, shuffling and carving the walls are done on whole NumPy arrays; only the
+# union-find pass runs wall by wall, over compact int arrays rather than lists of ints.
+def make_kruskal_grid(maze_width, maze_height, rng=random):
+    grid = create_grid_with_cells(maze_width, maze_height)
+    cell_columns = (maze_width - 1) // 2
+    cell_rows = (maze_height - 1) // 2
+    cell_count = cell_rows * cell_columns
+    if cell_count <= 1:
+        return grid
+
+    # Every wall between two cells, as the pair of cell numbers on either side, shuffled in place
+    cells = np.arange(cell_count, dtype=np.int32).reshape(cell_rows, cell_columns)
+    walls = np.empty((cell_rows * (cell_columns - 1) + (cell_rows - 1) * cell_columns, 2), dtype=np.int32)
+    split = cell_rows * (cell_columns - 1)
+    walls[:split, 0] = cells[:, :-1].ravel()
+    walls[:split, 1] = cells[:, 1:].ravel()
+    walls[split:, 0] = cells[:-1].ravel()
+    walls[split:, 1] = cells[1:].ravel()
+    numpy_rng(rng).shuffle(walls.view(np.int64).reshape(-1))  # Each pair moves as one 64-bit value
+
+    parent = array("i")
+    parent.frombytes(cells.tobytes())
+    del cells
+    rank = bytearray(cell_count)  # Upper bound on each root's tree height
+    kept = bytearray(len(walls))  # 1 for every wall knocked down
+    remaining = cell_count - 1
+    cell_pairs = iter(memoryview(walls.reshape(-1)))
+    for index, (a, b) in enumerate(zip(cell_pairs, cell_pairs)):
+        # Find both roots, halving the paths on the way
+        while parent[a] != a:
+            parent[a] = a = parent[parent[a]]
+        while parent[b] != b:
+            parent[b] = b = parent[parent[b]]
+        if a != b:
+            # Hang the shorter tree under the taller one, so finds stay short on huge grids
+            if rank[a] < rank[b]:
+                a, b = b, a
+            elif rank[a] == rank[b]:
+                rank[a] += 1
+            parent[b] = a
+            kept[index] = 1
+            remaining -= 1
+            if not remaining:
+                break
+
+    tiles = cell_tiles(maze_width, cell_rows, cell_columns).ravel()
+    walls = walls[np.frombuffer(kept, dtype=np.bool_)]
+    carve_passages(grid, tiles[walls[:, 0]], tiles[walls[:, 1]])
+    return grid
+
+# Randomized Prim's algorithm: grow the maze from one cell, each time connecting a random
+# frontier cell (one next to the maze) to a random neighbor already in the maze.
+# Works in place on the grid, which doubles as the visited and frontier sets.
+def make_prim_grid(maze_width, maze_height, rng=random):
+    grid = create_grid_with_cells(maze_width, maze_height, TILE_UNVISITED)
+    size = pad_grid(grid, maze_width)
+
+    cell_columns = (maze_width - 1) // 2
+    cell_rows = (maze_height - 1) // 2
+    if cell_columns <= 0 or cell_rows <= 0:
+        del grid[size:]
+        return grid
+
+    # Steps toward each neighbor wall (left, right, down, up); the neighbor cell is twice as far
+    directions = (-1, 1, -maze_width, maze_width)
+    choices = [tuple(step for bit, step in enumerate(directions) if mask >> bit & 1) for mask in range(16)]
+    random_value = rng.random
+
+    cell = (2 * rng.randrange(cell_rows) + 1) * maze_width + 2 * rng.randrange(cell_columns) + 1
+    frontier = []
+    while True:
+        grid[cell] = TILE_EMPTY
+        for step in directions:
+            neighbor = cell + 2 * step
+            if grid[neighbor] == TILE_UNVISITED:
+                grid[neighbor] = TILE_FRONTIER
+                frontier.append(neighbor)
+        if not frontier:
+            break
+
+        # Take a random frontier cell (swapping the last one into its place)
+        index = int(random_value() * len(frontier))
+        cell = frontier[index]
+        frontier[index] = frontier[-1]
+        frontier.pop()
+
+        # Connect it to a random neighbor already in the maze (the only cells at TILE_EMPTY)
+        options = choices[(grid[cell - 2] == TILE_EMPTY) | (grid[cell + 2] == TILE_EMPTY) << 1 |
+                          (grid[cell - 2 * maze_width] == TILE_EMPTY) << 2 |
+                          (grid[cell + 2 * maze_width] == TILE_EMPTY) << 3]
+        grid[cell + options[int(random_value() * len(options))]] = TILE_EMPTY
+
+    del grid[size:]
+    return grid
+
+# Wilson's algorithm: from each cell not yet in the maze, take a random walk until it hits the
+# maze, then add the walk with its loops erased. Gives every possible maze the same chance.
+# Each cell remembers the direction the walk last left it by, which erases loops for free.
+# Random directions are drawn from NumPy MAZE_WALK_BATCH at a time.
+def make_wilson_grid(maze_width, maze_height, rng=random):
+    grid = create_grid_with_cells(maze_width, maze_height, TILE_UNVISITED)
+    size = pad_grid(grid, maze_width)
+
+    cell_columns = (maze_width - 1) // 2
+    cell_rows = (maze_height - 1) // 2
+    if cell_columns <= 0 or cell_rows <= 0:
+        del grid[size:]
+        return grid
+
+    directions = (-1, 1, -maze_width, maze_width)
+    jumps = tuple(2 * step for step in directions)
+    exits = bytearray(len(grid))  # Direction the current walk last left each cell by
+    np_rng = numpy_rng(rng)
+    random_directions = b""
+    position = 0
+
+    # Walks start from every cell in random order; the first one is the maze's seed cell
+    starts = cell_tiles(maze_width, cell_rows, cell_columns).reshape(-1)
+    np_rng.shuffle(starts)
+    starts = memoryview(starts)
+    grid[starts[0]] = TILE_EMPTY
+    for start in starts[1:]:
+        if grid[start] == TILE_EMPTY:
+            continue
+
+        # Walk at random until the maze is reached
+        cell = start
+        while grid[cell] != TILE_EMPTY:
+            if position == len(random_directions):
+                random_directions = np_rng.integers(0, 4, MAZE_WALK_BATCH, dtype=np.uint8).tobytes()
+                position = 0
+            direction = random_directions[position]
+            position += 1
+            neighbor = cell + jumps[direction]
+            if grid[neighbor] != TILE_CRATE:
+                exits[cell] = direction
+                cell = neighbor
+
+        # Add the loop-erased walk by following the last exit out of each cell
+        cell = start
+        while grid[cell] != TILE_EMPTY:
+            grid[cell] = TILE_EMPTY
+            step = directions[exits[cell]]
+            grid[cell + step] = TILE_EMPTY
+            cell += 2 * step
+
+    del grid[size:]
+    return grid
+
+# Eller's algorithm: build the maze a row at a time, keeping only which cells of the current
+# row are connected (their sets). Neighbors in different sets are joined at random, every set
+# carries on into the next row at least once, and the last row joins whatever is left.
+def make_eller_grid(maze_width, maze_height, rng=random):
+    grid = create_grid_with_cells(maze_width, maze_height)
+    cell_columns = (maze_width - 1) // 2
+    cell_rows = (maze_height - 1) // 2
+    if cell_columns <= 0 or cell_rows <= 0:
+        return grid
+
+    random_value = rng.random
+    sets = list(range(cell_columns))  # Set of each cell in the row
+    members = {column: [column] for column in range(cell_columns)}  # Set -> its columns
+    next_set = cell_columns
+
+    for row in range(cell_rows):
+        row_start = (2 * row + 1) * maze_width
+        last_row = row == cell_rows - 1
+
+        # Join neighbors in different sets, merging the smaller set into the larger
+        for column in range(cell_columns - 1):
+            kept, merged = sets[column], sets[column + 1]
+            if kept != merged and (last_row or random_value() < MAZE_ELLER_JOIN_CHANCE):
+                grid[row_start + 2 * column + 2] = TILE_EMPTY
+                if len(members[kept]) < len(members[merged]):
+                    kept, merged = merged, kept
+                for index in members[merged]:
+                    sets[index] = kept
+                members[kept] += members.pop(merged)
+        if last_row:
+            break
+
+        # Every set continues up at least once; the other cells start new sets in the next row
+        next_sets = [-1] * cell_columns
+        next_members = {}
+        for cell_set, columns in members.items():
+            up = [column for column in columns if random_value() < MAZE_ELLER_UP_CHANCE]
+            if not up:
+                up = [columns[int(random_value() * len(columns))]]
+            for column in up:
+                grid[row_start + maze_width + 2 * column + 1] = TILE_EMPTY
+                next_sets[column] = cell_set
+            next_members[cell_set] = up
+        for column in range(cell_columns):
+            if next_sets[column] < 0:
+                next_sets[column] = next_set
+                next_members[next_set] = [column]
+                next_set += 1
+        sets, members = next_sets, next_members
+
+    return grid
+
+register_generator("dfs", "DFS", make_maze_grid)
+register_generator("kruskal", "Kruskal", make_kruskal_grid)
+register_generator("prim", "Prim", make_prim_grid)
+register_generator("wilson", "Wilson", make_wilson_grid)
+register_generator("eller", "Eller", make_eller_grid)
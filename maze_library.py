@@ -0,0 +1,267 @@
+# MAZE LIBRARY - Bit-packed maze records and a memory-mapped library of pre-generated mazes
+#
+#   python maze_library.py build mazes/library.mml    Generate a library (see --help for options)
+#   python maze_library.py info mazes/library.mml     Show what a library holds
+#
+# A maze record is the seed it was generated from (8 bytes), the maze grid and a bitset with
+# one bit per tile marking cheese. The grid is stored either as one bit per tile
+# (FORMAT_TILE_BITS, any maze) or, for mazes on the usual cell lattice, as two bits per cell
+# (FORMAT_WALL_BITS): whether the wall to its right and the wall above it are closed.
+#
+# A library file is a header, a table of sections (one per maze size) and then every section's
+# records back to back. All records in a section have the same size, so maze ID n of a size is
+# found by arithmetic and read straight out of the memory-mapped file.
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from constants import TILE_EMPTY, TILE_CRATE, MAZE_LIBRARY_PATH, USE_MAZE_LIBRARY, STORY_MODE_MAZE_SEQUENCE
+from functions import make_maze, merge_wall_rects, choose_cheese_positions, maze_array
+from maze_prefetch import MazeLayout, derive_maze_seed
+
+LIBRARY_MAGIC = b"MMLB"
+LIBRARY_VERSION = 1
+
+# Ways a maze grid can be stored
+FORMAT_TILE_BITS = 0
+FORMAT_WALL_BITS = 1
+
+# magic, version, library seed, section count
+_HEADER = struct.Struct("<4sB3xqI")
+# maze size, grid format, record size, maze count, offset of the first record
+_SECTION = struct.Struct("<IB3xIIQ")
+_SEED = struct.Struct("<Q")
+
+# Mazes generated per task when building a library
+BUILD_BATCH_SIZE = 2000
+
+# Libraries opened by get_library, by path
+_open_libraries = {}
+
+# Raised for files that aren't maze libraries or mazes that don't fit a format
+class MazeLibraryError(Exception):
+    pass
+
+# Return the number of bytes the grid of a maze takes in a format
+def grid_bytes(maze_size, grid_format):
+    if grid_format == FORMAT_WALL_BITS:
+        cells = (maze_size - 1) // 2
+        return (2 * cells * cells + 7) // 8
+    return (maze_size * maze_size + 7) // 8
+
+# Return the number of bytes one maze record takes
+def record_size(maze_size, grid_format):
+    return _SEED.size + grid_bytes(maze_size, grid_format) + (maze_size * maze_size + 7) // 8
+
+# Return True if a maze grid can be stored as wall bits: odd size, every cell open,
+# every lattice corner and the border closed
+def is_lattice_maze(tiles):
+    maze_size = tiles.shape[0]
+    if maze_size % 2 == 0 or maze_size < 3:
+        return False
+    return bool((tiles[1::2, 1::2] != TILE_CRATE).all() and
+                (tiles[::2, ::2] == TILE_CRATE).all() and
+                (tiles[0] == TILE_CRATE).all() and (tiles[-1] == TILE_CRATE).all() and
+                (tiles[:, 0] == TILE_CRATE).all() and (tiles[:, -1] == TILE_CRATE).all())
+
+# Pack a maze into one record
+# maze is a list of rows, cheese_positions a list of (row, column)
+def encode_maze(maze, maze_size, cheese_positions, seed, grid_format=FORMAT_WALL_BITS):
+    tiles = maze_array(maze)
+    if grid_format == FORMAT_WALL_BITS:
+        if not is_lattice_maze(tiles):
+            raise MazeLibraryError("Maze is not on the cell lattice, store it as FORMAT_TILE_BITS")
+        # Right wall then top wall of every cell, row by row
+        walls = np.stack((tiles[1::2, 2::2], tiles[2::2, 1::2]), axis=-1)
+        grid = np.packbits(walls.ravel() == TILE_CRATE)
+    else:
+        grid = np.packbits(tiles.ravel() == TILE_CRATE)
+
+    cheese = np.zeros(maze_size * maze_size, dtype=bool)
+    for (row, column) in cheese_positions:
+        cheese[row * maze_size + column] = True
+
+    return _SEED.pack(seed) + grid.tobytes() + np.packbits(cheese).tobytes()
+
+# Unpack a record into (seed, maze rows, cheese positions)
+# record can be any buffer, such as a slice of a memory-mapped library; it is read without copying
+def decode_maze(record, maze_size, grid_format):
+    (seed,) = _SEED.unpack_from(record)
+    size_bytes = grid_bytes(maze_size, grid_format)
+    packed = np.frombuffer(record, dtype=np.uint8, count=size_bytes, offset=_SEED.size)
+
+    if grid_format == FORMAT_WALL_BITS:
+        cells = (maze_size - 1) // 2
+        walls = np.unpackbits(packed, count=2 * cells * cells).reshape(cells, cells, 2)
+        tiles = np.full((maze_size, maze_size), TILE_CRATE, dtype=np.uint8)
+        tiles[1::2, 1::2] = TILE_EMPTY
+        tiles[1::2, 2::2] = walls[:, :, 0] * TILE_CRATE
+        tiles[2::2, 1::2] = walls[:, :, 1] * TILE_CRATE
+    else:
+        tiles = np.unpackbits(packed, count=maze_size * maze_size).reshape(maze_size, maze_size) * TILE_CRATE
+
+    cheese = np.frombuffer(record, dtype=np.uint8, count=(maze_size * maze_size + 7) // 8,
+                           offset=_SEED.size + size_bytes)
+    cheese_tiles = np.flatnonzero(np.unpackbits(cheese, count=maze_size * maze_size))
+    cheese_positions = [divmod(tile, maze_size) for tile in cheese_tiles.tolist()]
+
+    flat = tiles.astype(np.uint8).tobytes()
+    maze = [bytearray(flat[index:index + maze_size]) for index in range(0, len(flat), maze_size)]
+    return seed, maze, cheese_positions
+
+# A library file of pre-generated mazes, memory-mapped and read in place
+class MazeLibrary:
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = memoryview(self.data)
+
+        if len(self.data) < _HEADER.size:
+            raise MazeLibraryError(f"{path} is not a maze library")
+        magic, version, self.seed, section_count = _HEADER.unpack_from(self.data)
+        if magic != LIBRARY_MAGIC:
+            raise MazeLibraryError(f"{path} is not a maze library")
+        if version != LIBRARY_VERSION:
+            raise MazeLibraryError(f"{path} has unsupported version {version}")
+
+        # maze size -> (grid format, record size, maze count, offset)
+        self.sections = {}
+        for index in range(section_count):
+            maze_size, grid_format, size, count, offset = _SECTION.unpack_from(
+                self.data, _HEADER.size + index * _SECTION.size)
+            if offset + size * count > len(self.data):
+                raise MazeLibraryError(f"{path} is truncated")
+            self.sections[maze_size] = (grid_format, size, count, offset)
+
+    # Return True if the library has mazes of this size
+    def has_size(self, maze_size):
+        return maze_size in self.sections
+
+    # Return the number of mazes of a size
+    def count(self, maze_size):
+        return self.sections[maze_size][2] if maze_size in self.sections else 0
+
+    # Return the record of a maze as a zero-copy view into the file
+    def record(self, maze_size, maze_id):
+        grid_format, size, count, offset = self.sections[maze_size]
+        if not 0 <= maze_id < count:
+            raise IndexError(f"Maze {maze_id} out of range, the library has {count} mazes of size {maze_size}")
+        start = offset + maze_id * size
+        return self.view[start:start + size]
+
+    # Return the seed a maze was generated from
+    def maze_seed(self, maze_size, maze_id):
+        return _SEED.unpack_from(self.record(maze_size, maze_id))[0]
+
+    # Return (seed, maze rows, cheese positions) of a maze
+    def maze(self, maze_size, maze_id):
+        return decode_maze(self.record(maze_size, maze_id), maze_size, self.sections[maze_size][0])
+
+    # Return the MazeLayout of a maze, ready to play
+    def layout(self, maze_size, maze_id):
+        seed, maze, cheese_positions = self.maze(maze_size, maze_id)
+        return MazeLayout(maze_size, maze, merge_wall_rects(maze, maze_size), cheese_positions, seed)
+
+    # Release the memory map
+    def close(self):
+        self.view.release()
+        self.data.close()
+
+# Generate and encode mazes first_id..first_id+count-1 of a size
+def build_records(maze_size, grid_format, library_seed, first_id, count):
+    records = bytearray()
+    for maze_id in range(first_id, first_id + count):
+        seed = derive_maze_seed(library_seed, maze_id)
+        rng = random.Random(seed)
+        maze = make_maze(maze_size, maze_size, rng)
+        cheese_positions = choose_cheese_positions(maze, maze_size, rng)
+        records += encode_maze(maze, maze_size, cheese_positions, seed, grid_format)
+    return bytes(records)
+
+# Generate a library with count mazes of every size, using a pool of worker processes
+# Maze ID n of every size is the maze build_maze_layout would make from derive_maze_seed(seed, n)
+def build_library(path, sizes, count, seed, workers=None, progress=None):
+    sizes = sorted(set(sizes))
+    formats = {size: FORMAT_WALL_BITS if size % 2 == 1 else FORMAT_TILE_BITS for size in sizes}
+
+    header = bytearray(_HEADER.pack(LIBRARY_MAGIC, LIBRARY_VERSION, seed, len(sizes)))
+    offset = _HEADER.size + _SECTION.size * len(sizes)
+    for size in sizes:
+        size_bytes = record_size(size, formats[size])
+        header += _SECTION.pack(size, formats[size], size_bytes, count, offset)
+        offset += size_bytes * count
+
+    # Write to a temporary file so a half-built library is never picked up by the game
+    temporary_path = path + ".partial"
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open(temporary_path, "wb") as file, ProcessPoolExecutor(workers) as pool:
+        file.write(header)
+        for size in sizes:
+            batches = [(size, formats[size], seed, first_id, min(BUILD_BATCH_SIZE, count - first_id))
+                       for first_id in range(0, count, BUILD_BATCH_SIZE)]
+            # map keeps the batches in order, so records land at their IDs
+            for done, records in enumerate(pool.map(build_records, *zip(*batches)), 1):
+                file.write(records)
+                if progress:
+                    progress(size, min(done * BUILD_BATCH_SIZE, count), count)
+    os.replace(temporary_path, path)
+
+# Return the shared library at path, or None if there isn't one (or the game shouldn't use it)
+def get_library(path=MAZE_LIBRARY_PATH):
+    if not USE_MAZE_LIBRARY or not os.path.exists(path):
+        return None
+    if path not in _open_libraries:
+        _open_libraries[path] = MazeLibrary(path)
+    return _open_libraries[path]
+
+# Build or inspect a library from the command line
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect a maze library")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="generate a library")
+    build.add_argument("path", nargs="?", default=MAZE_LIBRARY_PATH)
+    build.add_argument("--sizes", type=int, nargs="+", default=sorted(set(STORY_MODE_MAZE_SEQUENCE)),
+                       help="maze sizes to generate (default: every story mode size)")
+    build.add_argument("--count", type=int, default=10000, help="mazes per size")
+    build.add_argument("--seed", type=int, default=0, help="library seed")
+    build.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+
+    info = commands.add_parser("info", help="show what a library holds")
+    info.add_argument("path", nargs="?", default=MAZE_LIBRARY_PATH)
+    args = parser.parse_args()
+
+    if args.command == "build":
+        start = time.perf_counter()
+
+        def progress(size, done, count):
+            print(f"\rSize {size}: {done}/{count}", end="", flush=True)
+            if done == count:
+                print()
+
+        build_library(args.path, args.sizes, args.count, args.seed, args.workers, progress)
+        seconds = time.perf_counter() - start
+        print(f"Wrote {args.path} ({os.path.getsize(args.path) / 1e6:.1f} MB) in {seconds:.1f} s")
+    else:
+        library = MazeLibrary(args.path)
+        print(f"{args.path}: seed {library.seed}")
+        for maze_size, (grid_format, size, count, offset) in sorted(library.sections.items()):
+            name = "wall bits" if grid_format == FORMAT_WALL_BITS else "tile bits"
+            print(f"  size {maze_size}: {count} mazes, {size} bytes each ({name})")
+        library.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# MAZE METRICS - Difficulty measures for many mazes at once, computed on whole NumPy arrays
+#
+# Works on a stack of same-size mazes (one per candidate) on the usual cell lattice and treats
+# them as perfect mazes, as every generator in maze_generators.py makes. For each maze:
+#
+#   solution_length  Steps from the spawn (1, 1) to the exit (size - 2, size - 2)
+#   dead_ends        Cells with a single way out
+#   branching        Share of cells that are junctions (three or more ways out)
+#   river            Mean number of cells off the solution path per dead end: high when the
+#                    wrong turns are long, winding corridors rather than short stubs
+#
+# Every step runs on all the mazes together: the cells' passages are read out of the tile stack
+# as boolean arrays, and the solution path is found by pruning every dead end off every maze
+# at once until only the path from spawn to exit is left.
+
+import numpy as np
+from constants import TILE_EMPTY
+from functions import maze_array
+
+# Metric names, in the order they are reported
+METRICS = ("solution_length", "dead_ends", "branching", "river")
+
+# Stack same-size mazes (lists of rows) into one (mazes, size, size) array of tiles
+def maze_stack(mazes):
+    return np.stack([maze_array(maze) for maze in mazes])
+
+# Return the number of open passages out of every cell
+# right and up mark the open passage to the right of and above each cell (mazes, rows, columns)
+def cell_degrees(right, up):
+    degrees = right.astype(np.uint8) + up
+    degrees[:, :, 1:] += right[:, :, :-1]
+    degrees[:, 1:, :] += up[:, :-1, :]
+    return degrees
+
+# Measure a stack of mazes, returning {metric name: array with one value per maze}
+def measure_mazes(tiles):
+    walkable = tiles == TILE_EMPTY
+    # Cell (row, column) is tile (2 row + 1, 2 column + 1); the border walls close the last passages
+    right = walkable[:, 1::2, 2::2].copy()
+    up = walkable[:, 2::2, 1::2].copy()
+    cell_count = right.shape[1] * right.shape[2]
+
+    degrees = cell_degrees(right, up)
+    dead_ends = np.count_nonzero(degrees == 1, axis=(1, 2))
+    junctions = np.count_nonzero(degrees >= 3, axis=(1, 2))
+
+    # The spawn and exit count as dead ends when they have a single way out, but aren't wrong turns
+    wrong_turns = dead_ends - (degrees[:, 0, 0] == 1) - (degrees[:, -1, -1] == 1)
+
+    # Prune dead ends until none are left besides the spawn and the exit: in a perfect maze
+    # that leaves exactly the cells of the path between them
+    alive = np.ones_like(right)
+    ends = np.zeros_like(right)
+    ends[:, 0, 0] = ends[:, -1, -1] = True
+    while True:
+        leaves = alive & (degrees <= 1) & ~ends
+        if not leaves.any():
+            break
+        alive &= ~leaves
+        kept = ~leaves
+        right &= kept
+        right[:, :, :-1] &= kept[:, :, 1:]
+        up &= kept
+        up[:, :-1, :] &= kept[:, 1:, :]
+        degrees = cell_degrees(right, up)
+    path_cells = np.count_nonzero(alive, axis=(1, 2))
+
+    return {
+        "solution_length": 2 * (path_cells - 1),  # Two tiles per cell step
+        "dead_ends": dead_ends,
+        "branching": junctions / cell_count,
+        "river": (cell_count - path_cells) / np.maximum(wrong_turns, 1),
+    }
+
+# Combine metrics into one difficulty score per maze, relative to the other mazes measured
+# Each metric is turned into a rank from 0 (lowest of the batch) to 1 (highest) and the ranks
+# are averaged with the given weights, so no metric's units dominate.
+def difficulty_scores(metrics, weights):
+    count = len(metrics[METRICS[0]])
+    scores = np.zeros(count)
+    for name, weight in weights.items():
+        ranks = np.empty(count)
+        ranks[np.argsort(metrics[name], kind="stable")] = np.arange(count) / max(count - 1, 1)
+        scores += weight * ranks
+    return scores / sum(weights.values())
@@ -0,0 +1,77 @@
+# MAZE PREFETCH - Builds upcoming mazes on a worker thread
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functions import merge_wall_rects, choose_cheese_positions
+from maze_generators import DEFAULT_GENERATOR, generate_maze
+
+# Shared worker for every game, created on first use
+_executor = None
+
+# Everything about a maze that can be computed without a GL context
+class MazeLayout:
+
+    def __init__(self, maze_size, maze, wall_rects, cheese_positions, seed=None, generator=DEFAULT_GENERATOR):
+        self.maze_size = maze_size
+        self.seed = seed  # Seed the layout was generated from
+        self.generator = generator  # Name of the maze generator that made it
+        self.maze = maze
+        self.wall_rects = wall_rects  # (column, row, width, height) in tiles
+        self.cheese_positions = cheese_positions  # (row, column)
+
+# Return the seed of maze number maze_number in a run started from run_seed
+# Every maze gets its own stream, so a maze can be rebuilt without replaying the ones before it
+def derive_maze_seed(run_seed, maze_number):
+    return random.Random(f"{run_seed}:{maze_number}").getrandbits(64)
+
+# Return a fresh run seed
+def new_run_seed():
+    return random.SystemRandom().getrandbits(64)
+
+# Generate the maze grid, merged walls and cheese positions for one maze
+# The same size, seed and generator always give the same layout; a seed of None picks one at random
+def build_maze_layout(maze_size, seed=None, generator=DEFAULT_GENERATOR):
+    if seed is None:
+        seed = new_run_seed()
+    rng = random.Random(seed)
+    maze = generate_maze(maze_size, maze_size, rng, generator)
+    wall_rects = merge_wall_rects(maze, maze_size)
+    cheese_positions = choose_cheese_positions(maze, maze_size, rng)
+    return MazeLayout(maze_size, maze, wall_rects, cheese_positions, seed, generator)
+
+# Return the shared prefetch worker
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="maze-prefetch")
+    return _executor
+
+# Keeps the next maze layout generating in the background while the current maze is played.
+# Only building the sprites from the layout is left for the main thread.
+# A layout is built by build(*args), build_maze_layout unless the caller has its own way.
+class MazePrefetcher:
+
+    def __init__(self):
+        self.pending = None
+        self.pending_key = None  # (build, args) being built
+
+    # Start building the next maze layout (no-op if the same one is already on its way)
+    def prefetch(self, build, *args):
+        if self.pending is not None:
+            if self.pending_key == (build, args):
+                return
+            self.pending.cancel()
+        self.pending_key = (build, args)
+        self.pending = get_executor().submit(build, *args)
+
+    # Hand out the prefetched layout, or build one now if nothing matching was prefetched
+    def take(self, build, *args):
+        pending, pending_key = self.pending, self.pending_key
+        self.pending = None
+        self.pending_key = None
+
+        if pending is not None:
+            if pending_key == (build, args):
+                return pending.result()
+            pending.cancel()
+        return build(*args)
@@ -0,0 +1,76 @@
+# MUSIC - One music player for the whole game, streaming the soundtrack and looping it without gaps
+
+import threading
+import pyglet
+import constants
+from constants import MUSIC_PATH, MUSIC_VOLUME_MULTIPLIER
+
+# Plays a streamed source forever: when the source runs out it is rewound and read on in the
+# same call, so the audio driver never runs dry and there is no gap at the loop point
+class LoopingStream(pyglet.media.StreamingSource):
+
+    def __init__(self, source):
+        self.source = source.get_queue_source()
+        self.audio_format = source.audio_format
+        self.video_format = None
+        self.info = source.info
+
+    def seek(self, timestamp):
+        self.source.seek(timestamp)
+
+    def get_audio_data(self, num_bytes, compensation_time=0.0):
+        audio_data = self.source.get_audio_data(num_bytes)
+        if audio_data is None:
+            self.source.seek(0.0)
+            audio_data = self.source.get_audio_data(num_bytes)
+        return audio_data
+
+    def delete(self):
+        self.source.delete()
+
+# The soundtrack, shared by every game. The file is decoded a few buffers at a time while it
+# plays, so memory stays flat however long the session runs, and there is only ever one player.
+class MusicService:
+
+    def __init__(self, path=MUSIC_PATH):
+        self.path = path
+        self.stream = None
+        self.player = None
+        self.lock = threading.Lock()  # The warm-up thread may open the file while a game starts
+
+    # Open the file, ready to play (safe to call from any thread)
+    def load(self):
+        with self.lock:
+            if self.stream is None:
+                self.stream = LoopingStream(pyglet.media.load(self.path, streaming=True))
+        return self.stream
+
+    # Return the volume the music should play at
+    def volume(self):
+        return MUSIC_VOLUME_MULTIPLIER * constants.VOLUME_SETTING
+
+    # Start the music, or carry on where it was paused
+    def play(self):
+        if self.player is None:
+            self.player = pyglet.media.Player()
+            self.player.queue(self.load())
+        self.player.volume = self.volume()
+        if not self.player.playing:
+            self.player.play()
+
+    # Pause the music, keeping its position
+    def pause(self):
+        if self.player is not None and self.player.playing:
+            self.player.pause()
+
+    # Apply a change to constants.VOLUME_SETTING straight away
+    def update_volume(self):
+        if self.player is not None:
+            self.player.volume = self.volume()
+
+# The music service shared by the whole process
+_music = MusicService()
+
+# Return the shared music service
+def get_music():
+    return _music
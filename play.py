@@ -1,19 +1,63 @@
 # MAIN FUNCTION
 
-import arcade
-from constants import WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE
-from view_manager import ViewManager
+import time
+START_TIME = time.perf_counter()
 
+import argparse
+
+# Everything heavier than argparse is imported in main(), after the arguments are checked,
+# and the game itself is imported in the background while the main menu is shown
 def main():
+    parser = argparse.ArgumentParser(description="Minute Mazes")
+    parser.add_argument("--asset-report", action="store_true", help="print how long each asset took to load")
+    parser.add_argument("--seed", type=int, help="generate the same mazes on every run")
+    parser.add_argument("--record", metavar="PATH", help="save the inputs of the last game played, for replay.py")
+    parser.add_argument("--trace", metavar="PATH", help="save per-phase frame timings as a Chrome trace-event JSON file")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="start a free play game straight away, print time to first frame and to first playable maze, then quit")
+    args = parser.parse_args()
+
+    import arcade
+    from constants import WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE
+    from profiler import get_profiler
+    from startup import Warmup, StartupProfile
+    from view_manager import ViewManager
+
+    startup_profile = StartupProfile(START_TIME) if args.startup_profile else None
+    if startup_profile:
+        startup_profile.mark("imports")
+
+    # Time every phase from the start, so setup shows up in the trace too
+    if args.trace:
+        get_profiler().tracing = True
+
     # Create a window class. This is what actually shows up on screen
     window = arcade.Window(WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE)
+    if startup_profile:
+        startup_profile.mark("window created")
+
+    # Load the game code, textures and sounds while the player looks at the main menu
+    warmup = Warmup(report=args.asset_report).start()
 
-    view_manager = ViewManager(window)
+    view_manager = ViewManager(window, seed=args.seed, record=args.record is not None)
     view_manager.show_main_menu()
+    if startup_profile:
+        startup_profile.mark("main menu built")
+        startup_profile.watch(window, view_manager, warmup)
 
     # Start the arcade game loop
     arcade.run()
 
+    # Save the run that was being played when the window closed
+    if view_manager.input_log is not None:
+        view_manager.input_log.finish(view_manager.recorded_simulation)
+        view_manager.input_log.save(args.record)
+        print(f"Saved replay to {args.record}")
+
+    if args.trace:
+        get_profiler().save_trace(args.trace)
+        print(f"Saved trace to {args.trace}")
+
 # Run the main function
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
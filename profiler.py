@@ -0,0 +1,118 @@
+# PROFILER - Per-phase frame timings for the in-game overlay and Chrome trace exports
+#
+# Wrap a piece of work in a named phase to time it:
+#
+#   with get_profiler().phase("physics"):
+#       ...
+#
+# Phases cost next to nothing while the profiler is off. With the overlay on, the time spent in
+# each phase is summed per frame and the last PROFILER_WINDOW_FRAMES frames are kept for
+# percentiles. With tracing on, every phase is also kept as a Chrome trace event, so a session
+# can be saved and opened in chrome://tracing or https://ui.perfetto.dev.
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from constants import PROFILER_WINDOW_FRAMES, PROFILER_TRACE_MAX_EVENTS
+
+# Stands in for a phase while the profiler is off
+class _NoPhase:
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NO_PHASE = _NoPhase()
+
+# Times one run of a phase and hands the result to the profiler
+class _Phase:
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.add(self.name, self.start, time.perf_counter())
+        return False
+
+# Collects phase timings for the overlay (enabled) and for a trace file (tracing)
+class FrameProfiler:
+
+    def __init__(self, window_frames=PROFILER_WINDOW_FRAMES, max_trace_events=PROFILER_TRACE_MAX_EVENTS):
+        self.enabled = False
+        self.tracing = False
+        self.window_frames = window_frames
+        self.frame_totals = {}  # name -> seconds spent in the phase this frame
+        self.samples = {}  # name -> deque of per-frame seconds, in the order phases first ran
+        self.trace_events = deque(maxlen=max_trace_events)  # (name, start, end), oldest dropped first
+        self.origin = time.perf_counter()
+
+    # Return a context manager that times the work inside it under a name
+    def phase(self, name):
+        if not (self.enabled or self.tracing):
+            return _NO_PHASE
+        return _Phase(self, name)
+
+    # Record one run of a phase, with start and end from time.perf_counter()
+    def add(self, name, start, end):
+        if self.enabled:
+            self.frame_totals[name] = self.frame_totals.get(name, 0.0) + end - start
+        if self.tracing:
+            self.trace_events.append((name, start, end))
+
+    # Close the current frame, moving its phase totals into the rolling window
+    def end_frame(self):
+        if not self.frame_totals:
+            return
+        for name, seconds in self.frame_totals.items():
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window_frames)
+            samples.append(seconds)
+        self.frame_totals.clear()
+
+    # Turn the overlay timings on or off, starting from an empty window
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.frame_totals.clear()
+        self.samples.clear()
+
+    # Return [(name, p50 seconds, p99 seconds)] over the frames in the window each phase ran in
+    def percentiles(self):
+        stats = []
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            count = len(ordered)
+            stats.append((name, ordered[count // 2], ordered[min(count - 1, count * 99 // 100)]))
+        return stats
+
+    # Return the recorded phases as a Chrome trace-event document
+    def trace(self):
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = [{"name": "process_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": "Minute Mazes"}}]
+        for name, start, end in self.trace_events:
+            events.append({"name": name, "ph": "X", "pid": pid, "tid": tid,
+                           "ts": (start - self.origin) * 1e6, "dur": (end - start) * 1e6})
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    # Write the recorded phases to a Chrome trace-event JSON file
+    def save_trace(self, path):
+        with open(path, "w") as file:
+            json.dump(self.trace(), file)
+
+# The profiler shared by the whole process
+_profiler = FrameProfiler()
+
+# Return the shared profiler
+def get_profiler():
+    return _profiler
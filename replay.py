@@ -0,0 +1,268 @@
+# REPLAY - Record the inputs of a run and play them back headless
+#
+#   python replay.py run.mmr          Replay a recorded run and check it ends the same way
+#
+# A run is reproduced from its seed and the inputs it received, each keyed by the simulation
+# tick it arrived on. Logs are stored compactly: ticks are delta-encoded varints and most
+# inputs fit in a single byte.
+
+import argparse
+import struct
+import sys
+import time
+
+from constants import SIMULATION_TICK
+from maze_generators import DEFAULT_GENERATOR
+from maze_library import get_library
+from simulation import Simulation, ACTION_NEXT_MAZE
+from view_manager import GameMode
+
+# First bytes of every log file, followed by the format version
+LOG_MAGIC = b"MMRP"
+LOG_VERSION = 3  # Version 3 added the maze generator; version 2 logs all used DEFAULT_GENERATOR
+
+# Game modes as stored in a log
+GAME_MODE_CODES = {GameMode.FREE_PLAY: 0, GameMode.STORY_MODE: 1, GameMode.ENDLESS: 2}
+
+# Raised when a log can't be read or doesn't fit the run it is replayed against
+class ReplayError(Exception):
+    pass
+
+# Append an unsigned integer as a little-endian base-128 varint
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+# Read a varint at offset, returning (value, next offset)
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError("Log ends in the middle of a number")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+# Map a signed integer to an unsigned one so small negatives stay short
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+# Undo _zigzag
+def _unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+# Return what a replay needs to know about a maze library: its seed and maze count per size
+def library_signature(library):
+    if library is None:
+        return None
+    return (library.seed, tuple(sorted((size, library.count(size)) for size in library.sections)))
+
+# The inputs of one run, keyed by the tick they arrived on, plus how the run ended
+# Attach one to a simulation with InputLog.attach(simulation) before its first maze starts.
+class InputLog:
+
+    def __init__(self, seed, game_mode, maze_size, library=None, generator=DEFAULT_GENERATOR):
+        self.seed = seed
+        self.game_mode = game_mode
+        self.maze_size = maze_size  # Size of the first maze
+        self.generator = generator  # Name of the maze generator the run used
+        self.library = library  # library_signature() of the maze library the run used, if any
+        self.events = []  # (tick, action, value)
+
+        # Filled in by finish()
+        self.end_tick = None
+        self.elapsed_time = None
+        self.score = None
+        self.grand_total_score = None
+
+    # Start recording a simulation's inputs
+    @classmethod
+    def attach(cls, simulation):
+        log = cls(simulation.seed, simulation.game_mode, simulation.get_current_maze_size(),
+                  library_signature(simulation.library), simulation.generator)
+        simulation.recorder = log
+        return log
+
+    # Called by the simulation for every input
+    def record(self, tick, action, value=0):
+        self.events.append((tick, action, value))
+
+    # Store how the run ended, so a replay can be checked against it
+    def finish(self, simulation):
+        self.end_tick = simulation.tick
+        self.elapsed_time = simulation.elapsed_time
+        self.score = simulation.score
+        self.grand_total_score = simulation.grand_total_score
+
+    # Return True if a simulation ended the same way as the recorded run
+    def matches(self, simulation):
+        return (simulation.tick == self.end_tick and
+                simulation.elapsed_time == self.elapsed_time and
+                simulation.score == self.score and
+                simulation.grand_total_score == self.grand_total_score)
+
+    # Encode the log
+    def to_bytes(self):
+        if self.end_tick is None:
+            raise ReplayError("Call finish() before saving a log")
+
+        out = bytearray(LOG_MAGIC)
+        out.append(LOG_VERSION)
+        out.append(GAME_MODE_CODES[self.game_mode])
+        _write_varint(out, _zigzag(self.seed))
+        _write_varint(out, self.maze_size)
+        generator = self.generator.encode("ascii")
+        _write_varint(out, len(generator))
+        out += generator
+        if self.library is None:
+            out.append(0)
+        else:
+            library_seed, counts = self.library
+            out.append(1)
+            _write_varint(out, _zigzag(library_seed))
+            _write_varint(out, len(counts))
+            for size, count in counts:
+                _write_varint(out, size)
+                _write_varint(out, count)
+        _write_varint(out, len(self.events))
+
+        # Each event is the ticks since the previous one, then action and small value in one byte
+        previous_tick = 0
+        for tick, action, value in self.events:
+            _write_varint(out, tick - previous_tick)
+            previous_tick = tick
+            if action == ACTION_NEXT_MAZE:
+                out.append(action << 2)
+                _write_varint(out, value)
+            else:
+                out.append(action << 2 | value)
+
+        _write_varint(out, self.end_tick - previous_tick)
+        out += struct.pack("<d", self.elapsed_time)
+        _write_varint(out, _zigzag(self.score))
+        _write_varint(out, _zigzag(self.grand_total_score))
+        return bytes(out)
+
+    # Decode a log made by to_bytes()
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:len(LOG_MAGIC)] != LOG_MAGIC:
+            raise ReplayError("Not a replay log")
+        offset = len(LOG_MAGIC)
+        version = data[offset]
+        if version not in (2, LOG_VERSION):
+            raise ReplayError(f"Unsupported replay log version {version}")
+        game_modes = {code: mode for mode, code in GAME_MODE_CODES.items()}
+        game_mode = game_modes[data[offset + 1]]
+        offset += 2
+
+        seed, offset = _read_varint(data, offset)
+        seed = _unzigzag(seed)
+        maze_size, offset = _read_varint(data, offset)
+        generator = DEFAULT_GENERATOR
+        if version >= 3:
+            length, offset = _read_varint(data, offset)
+            generator = data[offset:offset + length].decode("ascii")
+            offset += length
+        library = None
+        uses_library = data[offset]
+        offset += 1
+        if uses_library:
+            library_seed, offset = _read_varint(data, offset)
+            section_count, offset = _read_varint(data, offset)
+            counts = []
+            for _ in range(section_count):
+                size, offset = _read_varint(data, offset)
+                count, offset = _read_varint(data, offset)
+                counts.append((size, count))
+            library = (_unzigzag(library_seed), tuple(counts))
+        count, offset = _read_varint(data, offset)
+        log = cls(seed, game_mode, maze_size, library, generator)
+
+        tick = 0
+        for _ in range(count):
+            delta, offset = _read_varint(data, offset)
+            tick += delta
+            code = data[offset]
+            offset += 1
+            action, value = code >> 2, code & 3
+            if action == ACTION_NEXT_MAZE:
+                value, offset = _read_varint(data, offset)
+            log.events.append((tick, action, value))
+
+        delta, offset = _read_varint(data, offset)
+        log.end_tick = tick + delta
+        (log.elapsed_time,) = struct.unpack_from("<d", data, offset)
+        offset += 8
+        score, offset = _read_varint(data, offset)
+        grand_total_score, offset = _read_varint(data, offset)
+        log.score = _unzigzag(score)
+        log.grand_total_score = _unzigzag(grand_total_score)
+        return log
+
+    # Write the log to a file
+    def save(self, path):
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    # Read a log from a file
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+# Re-run a recorded run as fast as possible and return the simulation at its last tick
+# library: The maze library the run was recorded with, if it used one
+def replay(log, prefetcher=None, library=None):
+    if library_signature(library) != log.library:
+        if log.library is None:
+            library = None
+        else:
+            raise ReplayError("The run was recorded with a different maze library")
+    simulation = Simulation(log.game_mode, prefetcher, seed=log.seed, library=library, generator=log.generator)
+    if log.game_mode == GameMode.FREE_PLAY:
+        simulation.maze_size_setting = log.maze_size
+    simulation.start_maze()
+
+    for tick, action, value in log.events + [(log.end_tick, None, 0)]:
+        while simulation.tick < tick:
+            if simulation.finished:
+                raise ReplayError(f"Run finished at tick {simulation.tick} but the log continues to tick {tick}")
+            simulation.step(SIMULATION_TICK)
+        if simulation.tick > tick:
+            raise ReplayError(f"Log goes back to tick {tick} after tick {simulation.tick}")
+        if action is not None:
+            simulation.apply_action(action, value)
+        # Nothing renders a replay, so drop what it would have been told
+        simulation.events.clear()
+
+    return simulation
+
+# Replay a log given on the command line
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded run headless")
+    parser.add_argument("log", help="replay log written by play.py --record")
+    args = parser.parse_args()
+
+    log = InputLog.load(args.log)
+    start = time.perf_counter()
+    simulation = replay(log, library=get_library() if log.library else None)
+    seconds = time.perf_counter() - start
+
+    print(f"Seed {log.seed}, {log.game_mode.value}, {log.generator} mazes, {len(log.events)} inputs over {log.end_tick} ticks")
+    print(f"Replayed in {seconds:.3f} s ({log.end_tick * SIMULATION_TICK / seconds:.0f}x real time)")
+    print(f"Time: {simulation.elapsed_time:.3f} s, Cheese: {simulation.score}, Total Cheese: {simulation.grand_total_score}")
+    if not log.matches(simulation):
+        print(f"MISMATCH: recorded time {log.elapsed_time:.3f} s, cheese {log.score}, total cheese {log.grand_total_score}")
+        return 1
+    print("Matches the recorded run")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,496 @@
+# SIMULATION - Gameplay state and rules, independent of arcade rendering
+
+import constants
+from constants import (
+    SPRITE_SIZE,
+    MOVEMENT_SPEED,
+    DIAGONAL_MOVEMENT_FACTOR,
+    PLAYER_HIT_BOX,
+    CHEESE_HIT_BOX,
+    STORY_MODE_CURATION,
+    STORY_MODE_DIFFICULTY_CURVE,
+    STORY_MODE_MAZE_SEQUENCE,
+    STORY_MODE_TOTAL_MAZES,
+    PATHFINDER_DURATION,
+    PATHFINDER_MAX_TILES,
+    PATHFINDER_MAX_USES,
+    SIMULATION_TICK,
+    ENDLESS_MAZE_WIDTH
+)
+from cheese_index import CheeseIndex
+from distance_field import CachedPath, DistanceField
+from endless_maze import EndlessMaze
+from grid_physics import GridPhysicsEngine, StreamingGridPhysicsEngine
+from maze_generators import DEFAULT_GENERATOR
+from maze_prefetch import build_maze_layout, derive_maze_seed, new_run_seed
+from story_curation import get_curation_pool, pick_story_seed
+from profiler import get_profiler
+from view_manager import GameMode
+
+# Player spawn point (center of tile (1, 1)) in world pixels
+SPAWN_X = SPRITE_SIZE + SPRITE_SIZE / 2
+SPAWN_Y = SPRITE_SIZE + SPRITE_SIZE / 2
+
+# Movement directions the player can hold
+DIRECTIONS = ("up", "down", "left", "right")
+
+# Inputs a recorder is told about, as (action, value) with the tick they happened on
+ACTION_PRESS = 0  # value: index into DIRECTIONS
+ACTION_RELEASE = 1  # value: index into DIRECTIONS
+ACTION_PATHFINDER = 2
+ACTION_RESTART = 3  # value: 1 to deduct the maze's cheese from the grand total, else 0
+ACTION_NEXT_MAZE = 4  # value: size of the next maze
+
+# The player's position, speed and hit box in world pixels
+# Has the same attributes as a sprite, so the physics engine can move either
+class PlayerBody:
+
+    def __init__(self, center_x=SPAWN_X, center_y=SPAWN_Y, hit_box=PLAYER_HIT_BOX):
+        self.center_x = center_x
+        self.center_y = center_y
+        self.change_x = 0
+        self.change_y = 0
+        self.hit_box = hit_box
+
+    @property
+    def left(self):
+        return self.center_x + self.hit_box[0]
+
+    @property
+    def right(self):
+        return self.center_x + self.hit_box[1]
+
+    @property
+    def bottom(self):
+        return self.center_y + self.hit_box[2]
+
+    @property
+    def top(self):
+        return self.center_y + self.hit_box[3]
+
+# All gameplay state and rules for one game: the maze, player movement, collisions, cheese,
+# timers, Pathfinder uses and story progression. It never touches arcade, so it can run
+# without a window; GameView renders it and feeds it input.
+# Every maze is generated from its own seed, derived from the run seed and the maze number, so
+# a run seed plus the inputs and the ticks they arrived on reproduce a whole run (see replay.py).
+# Things a renderer needs to react to are appended to self.events as (name, ...) tuples:
+#   ("maze_started",)                 A new maze was loaded
+#   ("cheese_collected", index)       Cheese at index in layout.cheese_positions was collected
+#   ("cheese_restored", indices)      Collected cheese was put back by a restart
+#   ("pathfinder_shown", tiles)       Pathfinder revealed these (row, column) tiles
+#   ("pathfinder_cleared",)           The Pathfinder path was hidden
+#   ("exit_reached",)                 The player stepped onto the exit
+#   ("maze_completed",)               Free play maze finished, waiting for the next maze
+#   ("story_complete",)               The last story maze was finished
+#   ("chunk_loaded", chunk)           Endless mode generated a MazeChunk
+#   ("chunk_evicted", index)          Endless mode dropped the chunk with this index
+class Simulation:
+
+    # generator: Name of the maze generator for the whole run, the settings menu's choice if None
+    def __init__(self, game_mode=GameMode.FREE_PLAY, prefetcher=None, seed=None, library=None, generator=None):
+        self.game_mode = game_mode
+        self.prefetcher = prefetcher  # Optional MazePrefetcher that builds mazes in the background
+        self.library = library  # Optional MazeLibrary to draw mazes from instead of generating them
+        self.generator = constants.MAZE_GENERATOR_SETTING if generator is None else generator
+        self.recorder = None  # Optional object with record(tick, action, value), told about every input
+        self.profiler = get_profiler()
+
+        # Reproducibility
+        self.seed = new_run_seed() if seed is None else seed
+        self.maze_number = -1  # Mazes started so far, minus one
+        self.tick = 0  # Steps taken while a maze was in play
+        self.maze_size_setting = None  # Free play maze size, or None to follow the settings menu
+
+        # Story mode specific tracking
+        self.story_maze_index = 0  # Current maze in the sequence (0-9)
+        self.total_story_time = 0  # Total time across all story mazes
+
+        # Current maze
+        self.layout = None
+        self.maze = None
+        self.maze_size = 0
+        self.exit_tile = None
+        self.exit_distances = None  # Distance from every tile to the exit
+        self.exit_path = None  # Path to the exit cached between Pathfinder uses
+        self.cheese_index = None
+
+        # Player info
+        self.player = PlayerBody()
+        self.physics_engine = None
+        self.score = 0
+        self.grand_total_score = 0  # Cumulative score across all mazes
+
+        # Track the current state of what key is pressed
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+
+        # Timing and progress
+        self.elapsed_time = 0
+        self.completed_mazes = 0
+        self.best_time = None
+        self.finished = False  # Set when a maze is completed, until the next maze or a restart
+
+        # Pathfinder state
+        self.pathfinder_max_uses = PATHFINDER_MAX_USES
+        self.pathfinder_duration = PATHFINDER_DURATION
+        self.pathfinder_max_tiles = PATHFINDER_MAX_TILES
+        self.pathfinder_uses_remaining = PATHFINDER_MAX_USES
+        self.pathfinder_active = False
+        self.pathfinder_timer = 0.0
+        self.pathfinder_tiles = []
+
+        self.events = []
+
+    # Return the size of the maze the game is on (or about to load)
+    def get_current_maze_size(self):
+        if self.game_mode == GameMode.STORY_MODE:
+            return STORY_MODE_MAZE_SEQUENCE[self.story_maze_index]
+        elif self.game_mode == GameMode.ENDLESS:
+            return ENDLESS_MAZE_WIDTH
+        elif self.maze_size_setting is not None:
+            return self.maze_size_setting
+        else:
+            return constants.MAZE_SIZE_SETTING
+
+    # Return the seed for maze number maze_number of this run
+    def maze_seed(self, maze_number):
+        return derive_maze_seed(self.seed, maze_number)
+
+    # Return True if mazes of this size come from the library (which only holds default generator mazes)
+    def uses_library(self, maze_size):
+        return (self.library is not None and self.generator == DEFAULT_GENERATOR and
+                self.library.has_size(maze_size))
+
+    # Return the target difficulty of the story maze at an index, or None if story mazes aren't curated
+    def story_difficulty(self, story_index):
+        if self.game_mode != GameMode.STORY_MODE or not STORY_MODE_CURATION:
+            return None
+        return STORY_MODE_DIFFICULTY_CURVE[story_index]
+
+    # Build a maze layout: picked from the library by seed, or generated from the seed
+    # difficulty: Pick the seed's candidate closest to this difficulty instead (see story_curation.py)
+    # Runs on the prefetch thread when there is a prefetcher, with the candidates in worker processes
+    def build_layout(self, maze_size, seed, difficulty=None):
+        uses_library = self.uses_library(maze_size)
+        if difficulty is not None:
+            pool = get_curation_pool() if self.prefetcher is not None else None
+            seed = pick_story_seed(maze_size, seed, difficulty, self.generator,
+                                   self.library if uses_library else None, pool)
+        if uses_library:
+            return self.library.layout(maze_size, seed % self.library.count(maze_size))
+        return build_maze_layout(maze_size, seed, self.generator)
+
+    # Get a maze layout, prefetched if it was built ahead
+    def take_layout(self, maze_size, seed, difficulty=None):
+        if self.prefetcher is not None:
+            return self.prefetcher.take(self.build_layout, maze_size, seed, difficulty)
+        return self.build_layout(maze_size, seed, difficulty)
+
+    # Start building the maze that will follow the current one
+    def prefetch_next_maze(self):
+        if self.prefetcher is None or self.game_mode == GameMode.ENDLESS:
+            return
+        if self.game_mode == GameMode.STORY_MODE:
+            next_index = self.story_maze_index + 1
+            if next_index >= len(STORY_MODE_MAZE_SEQUENCE):
+                return
+            next_size = STORY_MODE_MAZE_SEQUENCE[next_index]
+            difficulty = self.story_difficulty(next_index)
+        else:
+            next_size = self.get_current_maze_size()
+            difficulty = None
+
+        # Library mazes are decoded in place, there is nothing to build ahead unless they are curated
+        if difficulty is not None or not self.uses_library(next_size):
+            self.prefetcher.prefetch(self.build_layout, next_size, self.maze_seed(self.maze_number + 1), difficulty)
+
+    # Load a new maze for the current size and reset the per-maze state
+    def start_maze(self):
+        self.maze_number += 1
+        self.load_maze(self.get_current_maze_size(), self.maze_seed(self.maze_number))
+
+        # Start building the next maze while this one is played
+        self.prefetch_next_maze()
+
+    # Load the maze of a size and seed, and put the player at its start
+    def load_maze(self, maze_size, seed):
+        self.maze_size = maze_size
+
+        # Place player at spawn point (held keys stay held, but movement restarts from rest)
+        self.player.center_x = SPAWN_X
+        self.player.center_y = SPAWN_Y
+        self.player.change_x = 0
+        self.player.change_y = 0
+
+        if self.game_mode == GameMode.ENDLESS:
+            # No exit and no Pathfinder, the maze goes on as long as the player climbs
+            self.layout = None
+            with self.profiler.phase("maze layout"):
+                self.maze = EndlessMaze(maze_size, seed)
+                self.maze.follow(self.get_player_tile()[0])
+            self.exit_tile = None
+            self.exit_distances = None
+            self.exit_path = None
+            self.cheese_index = self.maze
+            self.physics_engine = StreamingGridPhysicsEngine(self.player, self.maze)
+            self.pathfinder_uses_remaining = 0
+        else:
+            with self.profiler.phase("maze layout"):
+                layout = self.take_layout(maze_size, seed, self.story_difficulty(self.story_maze_index))
+            self.layout = layout
+            self.maze = layout.maze
+            self.exit_tile = (maze_size - 2, maze_size - 2)
+            with self.profiler.phase("distance field"):
+                self.exit_distances = DistanceField(self.maze, self.exit_tile)
+            self.exit_path = CachedPath(self.exit_distances)
+            with self.profiler.phase("cheese index"):
+                self.cheese_index = CheeseIndex(layout.cheese_positions, maze_size)
+            self.physics_engine = GridPhysicsEngine(self.player, self.maze)
+            self.pathfinder_uses_remaining = self.pathfinder_max_uses
+
+        self.score = 0
+        self.pathfinder_active = False
+        self.pathfinder_timer = 0.0
+        self.pathfinder_tiles = []
+        self.finished = False
+        self.events.append(("maze_started",))
+
+    # Move on to a new maze after a completed one (free play)
+    def advance_to_next_maze(self):
+        self.record(ACTION_NEXT_MAZE, self.get_current_maze_size())
+
+        # Update best time
+        if self.best_time is None or self.elapsed_time < self.best_time:
+            self.best_time = self.elapsed_time
+
+        # Increment completed mazes counter
+        self.completed_mazes += 1
+        # Reset elapsed time
+        self.elapsed_time = 0
+        # Generate new maze
+        self.start_maze()
+
+    # Restart the current maze without regenerating it
+    # deduct_score: If True, deduct collected coins from grand total (for mid-game restart).
+                  # If False, keep grand total intact (for replay after completion).
+    def restart_maze(self, deduct_score=True):
+        self.record(ACTION_RESTART, int(deduct_score))
+
+        # Deduct collected coins from grand total only if mid-game restart
+        if deduct_score:
+            self.grand_total_score -= self.score
+
+        # Reset current maze score and elapsed time
+        self.score = 0
+        self.elapsed_time = 0
+
+        if self.game_mode == GameMode.ENDLESS:
+            # Evicted rows are gone, so start the same endless maze over from the bottom
+            self.load_maze(self.maze_size, self.maze_seed(self.maze_number))
+        else:
+            # Restore all coins to the maze
+            self.events.append(("cheese_restored", self.cheese_index.reset()))
+
+        # Reset player position to spawn point and stop player movement
+        self.player.center_x = SPAWN_X
+        self.player.center_y = SPAWN_Y
+        self.player.change_x = 0
+        self.player.change_y = 0
+        self.left_pressed = False
+        self.right_pressed = False
+        self.up_pressed = False
+        self.down_pressed = False
+
+        self.clear_pathfinder()
+        self.finished = False
+
+    # Set whether a movement direction ("up", "down", "left" or "right") is held
+    def set_direction(self, direction, pressed):
+        self.record(ACTION_PRESS if pressed else ACTION_RELEASE, DIRECTIONS.index(direction))
+        setattr(self, f"{direction}_pressed", pressed)
+        self.update_player_speed()
+
+    # Calculate speed based on the keys pressed
+    def update_player_speed(self):
+        player = self.player
+        player.change_x = 0
+        player.change_y = 0
+
+        if self.up_pressed and not self.down_pressed:
+            player.change_y = MOVEMENT_SPEED
+        elif self.down_pressed and not self.up_pressed:
+            player.change_y = -MOVEMENT_SPEED
+        if self.left_pressed and not self.right_pressed:
+            player.change_x = -MOVEMENT_SPEED
+        elif self.right_pressed and not self.left_pressed:
+            player.change_x = MOVEMENT_SPEED
+
+        # Normalize diagonal movement so speed is consistent in all directions
+        if player.change_x != 0 and player.change_y != 0:
+            player.change_x *= DIAGONAL_MOVEMENT_FACTOR
+            player.change_y *= DIAGONAL_MOVEMENT_FACTOR
+
+    # Return the player's current tile as (row, column)
+    def get_player_tile(self):
+        return (int(self.player.center_y / SPRITE_SIZE), int(self.player.center_x / SPRITE_SIZE))
+
+    # Return how many tiles the player still has to walk to reach the exit
+    def get_exit_distance(self):
+        return max(0, self.exit_distances.distance(*self.get_player_tile()))
+
+    # Return how many rows the player has climbed (endless mode)
+    def get_height(self):
+        return self.get_player_tile()[0] - 1
+
+    # Generate endless maze chunks up to a row, such as the top of the screen
+    def generate_endless_rows(self, row):
+        for chunk in self.maze.ensure_row(row):
+            self.events.append(("chunk_loaded", chunk))
+
+    # Keep endless maze chunks generated ahead of the player and evict those far behind
+    def follow_player(self):
+        generated, evicted = self.maze.follow(self.get_player_tile()[0])
+        for chunk in generated:
+            self.events.append(("chunk_loaded", chunk))
+        for index in evicted:
+            self.events.append(("chunk_evicted", index))
+
+    # Collect any cheese the player touches, checking only the tiles under the player
+    def collect_cheese(self):
+        player = self.player
+        first_row, last_row = self.physics_engine.row_range(player.bottom, player.top)
+        first_column, last_column = self.physics_engine.column_range(player.left, player.right)
+        cheese_left, cheese_right, cheese_bottom, cheese_top = CHEESE_HIT_BOX
+
+        for row in range(first_row, last_row + 1):
+            for column in range(first_column, last_column + 1):
+                index = self.cheese_index.cheese_at(row, column)
+                if index is None:
+                    continue
+                center_x = column * SPRITE_SIZE + SPRITE_SIZE / 2
+                center_y = row * SPRITE_SIZE + SPRITE_SIZE / 2
+                if (player.left < center_x + cheese_right and player.right > center_x + cheese_left and
+                    player.bottom < center_y + cheese_top and player.top > center_y + cheese_bottom):
+                    self.cheese_index.collect(index)
+                    self.score += 1
+                    self.grand_total_score += 1
+                    self.events.append(("cheese_collected", index))
+
+    # Return True if the player's center is inside the exit tile
+    def player_on_exit(self):
+        exit_left = self.exit_tile[1] * SPRITE_SIZE
+        exit_bottom = self.exit_tile[0] * SPRITE_SIZE
+        return (exit_left < self.player.center_x < exit_left + SPRITE_SIZE and
+                exit_bottom < self.player.center_y < exit_bottom + SPRITE_SIZE)
+
+    # Show the next few tiles of the shortest path to the exit, if a use is left
+    # Returns True if Pathfinder was used
+    def use_pathfinder(self):
+        self.record(ACTION_PATHFINDER)
+        if self.pathfinder_uses_remaining <= 0:
+            return False
+
+        # Clear any existing path first
+        self.clear_pathfinder()
+
+        row, column = self.get_player_tile()
+        self.pathfinder_tiles = self.exit_path.next_tiles(row, column, self.pathfinder_max_tiles)
+        self.events.append(("pathfinder_shown", self.pathfinder_tiles))
+
+        # Consume a use and start timer
+        self.pathfinder_uses_remaining -= 1
+        self.pathfinder_active = True
+        self.pathfinder_timer = 0.0
+        return True
+
+    # Hide the Pathfinder path
+    def clear_pathfinder(self):
+        self.pathfinder_active = False
+        self.pathfinder_timer = 0.0
+        self.pathfinder_tiles = []
+        self.events.append(("pathfinder_cleared",))
+
+    # Tell the recorder, if there is one, about an input on the current tick
+    def record(self, action, value=0):
+        if self.recorder is not None:
+            self.recorder.record(self.tick, action, value)
+
+    # Apply a recorded input
+    def apply_action(self, action, value=0):
+        if action == ACTION_PRESS:
+            self.set_direction(DIRECTIONS[value], True)
+        elif action == ACTION_RELEASE:
+            self.set_direction(DIRECTIONS[value], False)
+        elif action == ACTION_PATHFINDER:
+            self.use_pathfinder()
+        elif action == ACTION_RESTART:
+            self.restart_maze(deduct_score=bool(value))
+        elif action == ACTION_NEXT_MAZE:
+            if self.game_mode == GameMode.FREE_PLAY:
+                self.maze_size_setting = value
+            self.advance_to_next_maze()
+        else:
+            raise ValueError(f"Unknown action {action}")
+
+    # Advance the game by one tick
+    def step(self, delta_time=SIMULATION_TICK):
+        if self.finished:
+            return
+        self.tick += 1
+
+        # Cheese can only be reached by moving, so a player standing still skips the check
+        profiler = self.profiler
+        player = self.player
+        old_x, old_y = player.center_x, player.center_y
+        with profiler.phase("physics"):
+            self.physics_engine.update()
+        if player.center_x != old_x or player.center_y != old_y:
+            with profiler.phase("cheese"):
+                self.collect_cheese()
+
+        if self.game_mode == GameMode.ENDLESS:
+            with profiler.phase("endless rows"):
+                self.follow_player()
+            on_exit = False
+        else:
+            with profiler.phase("exit check"):
+                on_exit = self.player_on_exit()
+
+        # Check if player reached the exit (player center must be on the exit tile)
+        if on_exit:
+            self.events.append(("exit_reached",))
+
+            if self.game_mode == GameMode.STORY_MODE:
+                # Track total time across all mazes
+                self.total_story_time += self.elapsed_time
+
+                # Check if this was the last maze
+                if self.story_maze_index >= STORY_MODE_TOTAL_MAZES - 1:
+                    self.finished = True
+                    self.events.append(("story_complete",))
+                else:
+                    # Move to next maze in story, no congratulations screen in between
+                    self.story_maze_index += 1
+                    self.elapsed_time = 0
+                    self.completed_mazes += 1
+                    self.start_maze()
+            else:
+                self.finished = True
+                self.events.append(("maze_completed",))
+
+        # Update the elapsed time
+        self.elapsed_time += delta_time
+
+        # Update pathfinder timer - auto-hide after duration
+        if self.pathfinder_active:
+            self.pathfinder_timer += delta_time
+            if self.pathfinder_timer >= self.pathfinder_duration:
+                self.clear_pathfinder()
+
+    # Return and clear the events since the last call
+    def take_events(self):
+        events = self.events
+        self.events = []
+        return events
@@ -0,0 +1,78 @@
+# SOUND_EFFECTS - Plays the game's short sounds from a fixed pool of reusable voices
+
+import time
+import pyglet
+import constants
+from assets import get_sound
+from constants import SOUND_EFFECTS, SOUND_VOLUME_MULTIPLIER
+
+# A player that keeps its sound queued after it finishes, so playing it again reuses the
+# player and its audio driver buffers instead of allocating new ones
+class Voice(pyglet.media.Player):
+
+    def __init__(self, source):
+        super().__init__()
+        self.started = 0.0  # time.perf_counter() when the voice last started
+        self.queue(source)
+
+    # Play the sound from the start, cutting off whatever this voice was playing
+    def trigger(self, volume, now):
+        self.seek(0.0)
+        self.volume = volume
+        self.started = now
+        self.play()
+
+    # Stop and rewind when the sound ends, rather than moving on and releasing the source
+    def on_eos(self):
+        self.pause()
+        self.seek(0.0)
+
+# One sound effect, decoded once and played on at most len(voices) voices at a time
+class SoundEffect:
+
+    def __init__(self, path, voices, cooldown):
+        source = get_sound(path).source  # Already decoded in memory; voices share its samples
+        self.voices = [Voice(source) for _ in range(voices)]
+        self.cooldown = cooldown
+        self.last_played = None
+
+    # Start the effect on a free voice, or on the one that started longest ago if they are
+    # all busy. Returns False without playing if it already started within the cooldown.
+    def play(self, volume, now):
+        if self.last_played is not None and now - self.last_played < self.cooldown:
+            return False
+        voice = next((voice for voice in self.voices if not voice.playing), None)
+        if voice is None:
+            voice = min(self.voices, key=lambda voice: voice.started)
+        voice.trigger(volume, now)
+        self.last_played = now
+        return True
+
+# Every sound effect in the game, keyed by the names in SOUND_EFFECTS
+class SoundEffects:
+
+    def __init__(self, effects=SOUND_EFFECTS):
+        self.config = effects  # name -> (path, voices, cooldown seconds)
+        self.effects = {}
+
+    # Decode the sounds and create their voices (main thread, before the first game)
+    def load(self):
+        for name, (path, voices, cooldown) in self.config.items():
+            if name not in self.effects:
+                self.effects[name] = SoundEffect(path, voices, cooldown)
+
+    # Play a sound effect at the current volume setting
+    def play(self, name):
+        effect = self.effects.get(name)
+        if effect is None:
+            self.load()
+            effect = self.effects[name]
+        volume = SOUND_VOLUME_MULTIPLIER * constants.VOLUME_SETTING
+        return effect.play(volume, time.perf_counter())
+
+# The sound effects shared by the whole process
+_sound_effects = SoundEffects()
+
+# Return the shared sound effects
+def get_sound_effects():
+    return _sound_effects
@@ -0,0 +1,104 @@
+# SPRITE CHUNKS - Sprite layers split into spatial chunks so only what is on screen gets drawn
+
+import math
+import arcade
+from constants import SPRITE_SIZE, CULL_CHUNK_TILES
+
+# Return the part of the world a camera shows as (left, right, bottom, top)
+def camera_view_bounds(camera):
+    x, y = camera.position
+    half_width = camera.viewport_width / 2 / camera.zoom
+    half_height = camera.viewport_height / 2 / camera.zoom
+    return x - half_width, x + half_width, y - half_height, y + half_height
+
+# Split a (column, row, width, height) rectangle of tiles at chunk boundaries
+# Returns the pieces, so no piece sticks out of the chunk holding its center by more than a tile
+def split_rect_at_chunks(column, row, width, height, chunk_tiles=CULL_CHUNK_TILES):
+    # Start of every piece along one axis: the rectangle's start, then every chunk boundary inside it
+    def starts(start, length):
+        return [start] + list(range((start // chunk_tiles + 1) * chunk_tiles, start + length, chunk_tiles))
+
+    row_starts = starts(row, height)
+    column_starts = starts(column, width)
+    row_ends = row_starts[1:] + [row + height]
+    column_ends = column_starts[1:] + [column + width]
+    return [(first_column, first_row, end_column - first_column, end_row - first_row)
+            for first_row, end_row in zip(row_starts, row_ends)
+            for first_column, end_column in zip(column_starts, column_ends)]
+
+# One chunk of a layer: its sprites and the area they cover
+class SpriteChunk:
+
+    def __init__(self):
+        self.sprite_list = arcade.SpriteList()
+        self.left = self.bottom = float("inf")
+        self.right = self.top = float("-inf")
+
+    # Add a sprite and grow the chunk's bounds to cover it
+    def append(self, sprite):
+        self.sprite_list.append(sprite)
+        self.left = min(self.left, sprite.left)
+        self.right = max(self.right, sprite.right)
+        self.bottom = min(self.bottom, sprite.bottom)
+        self.top = max(self.top, sprite.top)
+
+    # Return True if the chunk covers any of the given area
+    def overlaps(self, left, right, bottom, top):
+        return self.left < right and self.right > left and self.bottom < top and self.top > bottom
+
+# A layer of sprites that don't move, kept in one SpriteList per square of
+# CULL_CHUNK_TILES x CULL_CHUNK_TILES tiles. Sprites go in the chunk holding their center;
+# a chunk's bounds grow to fit sprites that stick out of it, and the layer looks that many
+# chunks further out when culling, so nothing that should be visible is hidden. Keep sprites
+# small (see split_rect_at_chunks) so the search stays close to the screen.
+# Sprites can also be looked up in the order they were added, like a SpriteList.
+class ChunkedSpriteLayer:
+
+    def __init__(self, chunk_tiles=CULL_CHUNK_TILES):
+        self.chunk_size = chunk_tiles * SPRITE_SIZE
+        self.chunks = {}  # (chunk column, chunk row) -> SpriteChunk
+        self.sprites = []
+        self.overhang = 0  # Most chunks any sprite reaches beyond its own chunk
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def __getitem__(self, index):
+        return self.sprites[index]
+
+    def __iter__(self):
+        return iter(self.sprites)
+
+    # Add a sprite to the chunk under its center
+    def append(self, sprite):
+        size = self.chunk_size
+        key = (int(sprite.center_x // size), int(sprite.center_y // size))
+        self.overhang = max(self.overhang,
+                            key[0] - math.floor(sprite.left / size), math.floor(sprite.right / size) - key[0],
+                            key[1] - math.floor(sprite.bottom / size), math.floor(sprite.top / size) - key[1])
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = SpriteChunk()
+        chunk.append(sprite)
+        self.sprites.append(sprite)
+
+    # Return the chunks that overlap an area
+    # Only the chunk keys around the area are looked at, so the cost depends on the area, not the layer
+    def visible_chunks(self, left, right, bottom, top):
+        size = self.chunk_size
+        first_column = math.floor(left / size) - self.overhang
+        last_column = math.floor(right / size) + self.overhang
+        first_row = math.floor(bottom / size) - self.overhang
+        last_row = math.floor(top / size) + self.overhang
+        if (last_column - first_column + 1) * (last_row - first_row + 1) > len(self.chunks):
+            candidates = self.chunks.values()
+        else:
+            candidates = filter(None, (self.chunks.get((column, row))
+                                       for row in range(first_row, last_row + 1)
+                                       for column in range(first_column, last_column + 1)))
+        return [chunk for chunk in candidates if chunk.overlaps(left, right, bottom, top)]
+
+    # Draw only the chunks that a camera can see
+    def draw(self, camera, **kwargs):
+        for chunk in self.visible_chunks(*camera_view_bounds(camera)):
+            chunk.sprite_list.draw(**kwargs)
@@ -0,0 +1,125 @@
+# STARTUP - Warm up the first game in the background and measure how long startup takes
+
+import importlib
+import threading
+import time
+from constants import STARTUP_FONT_WARMUP_DELAY, STARTUP_PROFILE_MENU_IDLE
+
+# Modules only a game needs, imported while the main menu is idle
+WARMUP_MODULES = ("game",)
+
+# Imports the game code, loads every asset and opens the music stream on a background thread,
+# so the main menu shows straight away and starting a game doesn't stall on disk or the decoder.
+# The HUD font needs GL, so it is rendered on the main thread once the main menu is up.
+class Warmup:
+
+    # report: Print assets.load_report() once everything is loaded
+    def __init__(self, report=False):
+        self.report = report
+        self.thread = threading.Thread(target=self.run, name="warmup", daemon=True)
+        self.finished = threading.Event()
+        self.duration = None
+        self.error = None
+
+    # Start warming up
+    def start(self):
+        import arcade
+        self.thread.start()
+        arcade.schedule_once(self.warm_up_fonts, STARTUP_FONT_WARMUP_DELAY)
+        return self
+
+    # Render the HUD font (main thread)
+    def warm_up_fonts(self, delta_time):
+        from hud import warm_up_fonts
+        warm_up_fonts()
+
+    # Load everything, in the order the first game needs it
+    def run(self):
+        import assets
+        from music import get_music
+        start = time.perf_counter()
+        try:
+            for name in WARMUP_MODULES:
+                importlib.import_module(name)
+            assets.preload_all()
+            get_music().load()
+        except Exception as error:
+            # The game loads whatever is missing itself when it starts, and reports the error there
+            self.error = error
+        self.duration = time.perf_counter() - start
+        self.finished.set()
+        if self.report:
+            print(assets.load_report())
+
+# Times the way to the first playable maze: the main menu's first frame, then a simulated
+# click on Free Play after STARTUP_PROFILE_MENU_IDLE seconds, then the maze's first frame.
+# Prints a report and quits.
+class StartupProfile:
+
+    def __init__(self, start_time):
+        self.start_time = start_time  # time.perf_counter() when play.py started
+        self.marks = []  # (name, seconds since start)
+        self.window = None
+        self.view_manager = None
+        self.warmup = None
+        self.after_next_frame = None  # Called once the next frame is on screen
+
+    # Note the time of a startup step
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.start_time))
+
+    # Start watching frames once the main menu has been shown
+    def watch(self, window, view_manager, warmup=None):
+        self.window = window
+        self.view_manager = view_manager
+        self.warmup = warmup
+        self.after_next_frame = self.menu_drawn
+        window.push_handlers(on_draw=self.on_draw)
+
+    # Called before each frame is drawn
+    def on_draw(self):
+        if self.after_next_frame is not None:
+            import arcade
+            # Clock callbacks run once the frame being drawn is on screen
+            arcade.schedule_once(self.after_next_frame, 0)
+            self.after_next_frame = None
+
+    # Called once the main menu's first frame is on screen
+    def menu_drawn(self, delta_time):
+        import arcade
+        self.mark("first frame (main menu)")
+        arcade.schedule_once(self.start_game, STARTUP_PROFILE_MENU_IDLE)
+
+    # Called once the game's first frame is on screen
+    def game_drawn(self, delta_time):
+        import arcade
+        self.mark("first playable maze")
+        print(self.report())
+        # Leave the game loop; closing the window here would pull the GL context from
+        # under callbacks still due this tick
+        arcade.exit()
+
+    # Start a free play game as if the button was clicked
+    def start_game(self, delta_time):
+        from view_manager import GameMode
+        self.mark("Free Play clicked")
+        self.view_manager.show_game(game_mode=GameMode.FREE_PLAY)
+        self.after_next_frame = self.game_drawn
+
+    # Build the report
+    def report(self):
+        lines = [f"{'Startup step':<32}{'At ms':>10}"]
+        for name, seconds in self.marks:
+            lines.append(f"{name:<32}{seconds * 1000:>10.1f}")
+        marks = dict(self.marks)
+        lines.append(f"Time to first frame:          {marks['first frame (main menu)'] * 1000:8.1f} ms")
+        lines.append(f"Time to first playable maze:  {marks['first playable maze'] * 1000:8.1f} ms "
+                     f"({(marks['first playable maze'] - marks['Free Play clicked']) * 1000:.1f} ms after the click)")
+        if self.warmup is not None:
+            if self.warmup.finished.is_set():
+                lines.append(f"Background warm-up took {self.warmup.duration * 1000:.1f} ms")
+            else:
+                lines.append("Background warm-up was still running when the maze started")
+            if self.warmup.error is not None:
+                lines.append(f"Background warm-up failed: {self.warmup.error!r}")
+        return "\n".join(lines)
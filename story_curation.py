@@ -0,0 +1,67 @@
+# STORY CURATION - Picks story mode mazes along a difficulty curve instead of taking the first roll
+#
+# Each story maze's seed stands for STORY_MODE_CANDIDATES candidate mazes (seeds derived from
+# it). The candidates are generated and measured in worker processes, ranked by difficulty and
+# the one at the maze's point on STORY_MODE_DIFFICULTY_CURVE is played. The pick only depends
+# on the seed, so a run (and its replay) always gets the same mazes.
+
+import multiprocessing
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from constants import (
+    STORY_MODE_CANDIDATES,
+    STORY_MODE_CURATION_WORKERS,
+    STORY_MODE_DIFFICULTY_WEIGHTS
+)
+from maze_generators import generate_maze
+from maze_metrics import METRICS, difficulty_scores, maze_stack, measure_mazes
+from maze_prefetch import derive_maze_seed
+
+# Shared worker processes, created on first use
+_pool = None
+
+# Return the shared curation worker processes
+# They are started fresh rather than forked, so they never inherit the game's window or audio threads
+def get_curation_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(STORY_MODE_CURATION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+# Start the worker processes in the background, so the first story maze doesn't wait for them
+def warm_up_curation_pool():
+    pool = get_curation_pool()
+    for _ in range(STORY_MODE_CURATION_WORKERS):
+        pool.submit(int)
+
+# Return the seeds of the candidates for a maze seed
+def candidate_seeds(maze_seed, count=STORY_MODE_CANDIDATES):
+    return [derive_maze_seed(maze_seed, index) for index in range(count)]
+
+# Generate the mazes of some candidate seeds and measure them (runs in a worker process)
+# Each maze is the one build_maze_layout makes from the same seed
+def measure_candidates(maze_size, seeds, generator):
+    mazes = [generate_maze(maze_size, maze_size, random.Random(seed), generator) for seed in seeds]
+    return measure_mazes(maze_stack(mazes))
+
+# Return the seed of the candidate closest to a target difficulty
+# difficulty: Target percentile among the candidates, from 0.0 (easiest) to 1.0 (hardest)
+# library: MazeLibrary to take the candidates from (by seed, like Simulation.take_layout), if any
+# pool: Worker processes to generate the candidates in, or None to generate them here
+def pick_story_seed(maze_size, maze_seed, difficulty, generator, library=None, pool=None):
+    seeds = candidate_seeds(maze_seed)
+    if library is not None:
+        count = library.count(maze_size)
+        metrics = measure_mazes(maze_stack([library.maze(maze_size, seed % count)[1] for seed in seeds]))
+    elif pool is not None:
+        # One run of the candidates per worker, kept in order so ties rank the same as without a pool
+        share = -(-len(seeds) // STORY_MODE_CURATION_WORKERS)
+        shares = [seeds[start:start + share] for start in range(0, len(seeds), share)]
+        results = list(pool.map(measure_candidates, [maze_size] * len(shares), shares, [generator] * len(shares)))
+        metrics = {name: np.concatenate([result[name] for result in results]) for name in METRICS}
+    else:
+        metrics = measure_candidates(maze_size, seeds, generator)
+
+    order = np.argsort(difficulty_scores(metrics, STORY_MODE_DIFFICULTY_WEIGHTS), kind="stable")
+    return seeds[order[round(difficulty * (len(seeds) - 1))]]
@@ -1,57 +1,91 @@
 # VIEW MANAGER
 
-import arcade
 from enum import Enum
 
 class GameMode(Enum):
     STORY_MODE = "story_mode"
     FREE_PLAY = "free_play"
+    ENDLESS = "endless"
 
 # Manages all view transitions and acts as a mediator between views and game.
+# Menu views are built once and kept for the whole session; views that show game results
+# only have their labels refreshed each time they are shown.
 class ViewManager:
     
-    def __init__(self, window):
+    # seed: Run seed for every game started, random for each game if None
+    # record: Record the inputs of every game, keeping the latest in self.input_log
+    def __init__(self, window, seed=None, record=False):
         self.window = window
+        self.seed = seed
+        self.record = record
+        self.input_log = None
+        self.recorded_simulation = None
+        self.views = {}  # Long-lived views keyed by (view class, constructor arguments)
+
+    # Return the long-lived view of a class, building it the first time it is needed
+    def get_view(self, view_class, *args):
+        key = (view_class, args)
+        view = self.views.get(key)
+        if view is None:
+            view = self.views[key] = view_class(self, *args)
+        return view
 
     # Show the main menu
     def show_main_menu(self):
         from views import MainMenuView
-        view = MainMenuView(self)
+
+        # The game is over, so don't let the pause and results views keep it alive
+        for view in self.views.values():
+            if hasattr(view, "game_view"):
+                view.game_view = None
+
+        view = self.get_view(MainMenuView)
         self.window.show_view(view)
     
     # Show mouse color selection for story mode
     def show_mouse_selection(self):
         from views import MouseSelectionView
-        view = MouseSelectionView(self)
+        from story_curation import warm_up_curation_pool
+        # Story mode is next: start the workers that pick its mazes while the player chooses
+        warm_up_curation_pool()
+        view = self.get_view(MouseSelectionView)
         self.window.show_view(view)
     
     # Create and show a new game
     def show_game(self, game_mode=GameMode.FREE_PLAY, story_mouse_color="white"):
         from game import GameView
-        game_view = GameView(self, game_mode=game_mode, story_mouse_color=story_mouse_color)
+        game_view = GameView(self, game_mode=game_mode, story_mouse_color=story_mouse_color, seed=self.seed)
+        if self.record:
+            from replay import InputLog
+            self.input_log = InputLog.attach(game_view.simulation)
+            self.recorded_simulation = game_view.simulation
         game_view.setup()
         self.window.show_view(game_view)
     
     # Show settings menu
     def show_settings(self, previous_view=None, game_mode=GameMode.FREE_PLAY):
         from views import SettingsView
-        view = SettingsView(self, previous_view=previous_view, game_mode=game_mode)
+        view = self.get_view(SettingsView, game_mode)
+        view.refresh(previous_view)
         self.window.show_view(view)
     
     # Show pause menu during gameplay
     def show_in_game_menu(self, game_view):
         from views import InGameMenuView
-        view = InGameMenuView(self, game_view)
+        view = self.get_view(InGameMenuView)
+        view.refresh(game_view)
         self.window.show_view(view)
     
     # Show congratulations screen after completing a maze
     def show_congratulations(self, game_view):
         from views import CongratulationsView
-        view = CongratulationsView(self, game_view)
+        view = self.get_view(CongratulationsView)
+        view.refresh(game_view)
         self.window.show_view(view)
     
     # Show story mode victory screen
     def show_story_victory(self, game_view):
         from views import StoryVictoryView
-        view = StoryVictoryView(self, game_view)
+        view = self.get_view(StoryVictoryView)
+        view.refresh(game_view)
         self.window.show_view(view)
\ No newline at end of file
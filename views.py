@@ -16,8 +16,17 @@ from constants import (
     UI_SPACING_SMALL,
     UI_SPACING_TINY,
 )
+from maze_generators import GENERATORS
+from music import get_music
 from view_manager import GameMode
 
+# Show a button in blue when it is the selected option, and in the default style otherwise
+def highlight_button(button, selected):
+    style = arcade.gui.UIFlatButton.STYLE_BLUE if selected else arcade.gui.UIFlatButton.DEFAULT_STYLE
+    if button.style != style:
+        button.style = style
+        button.trigger_render()
+
 # Main Menu View with GUI widgets
 class MainMenuView(arcade.View):
 
@@ -71,6 +80,19 @@ class MainMenuView(arcade.View):
         def on_free_play_click(_):
             self.view_manager.show_game(game_mode=GameMode.FREE_PLAY)
         
+        # Create Endless button
+        endless_button = arcade.gui.UIFlatButton(
+            text="Endless",
+            width=UI_BUTTON_WIDTH_LARGE,
+            height=UI_BUTTON_HEIGHT_LARGE,
+            style=arcade.gui.UIFlatButton.STYLE_BLUE
+        )
+        menu_box.add(endless_button)
+        
+        @endless_button.event("on_click")
+        def on_endless_click(_):
+            self.view_manager.show_game(game_mode=GameMode.ENDLESS)
+        
         # Create settings button
         settings_button = arcade.gui.UIFlatButton(
             text="Settings",
@@ -235,14 +257,18 @@ class MouseSelectionView(arcade.View):
         self.ui.draw()
 
 # Settings Menu View with maze size options
+# Built once per game mode; refresh() points it at the view that opened it and shows the current settings
 class SettingsView(arcade.View):
 
-    def __init__(self, view_manager, previous_view=None, game_mode=GameMode.FREE_PLAY):
+    def __init__(self, view_manager, game_mode=GameMode.FREE_PLAY):
         super().__init__()
         self.view_manager = view_manager
-        self.previous_view = previous_view  # Store the view that opened settings
+        self.previous_view = None  # Store the view that opened settings
         self.game_mode = game_mode
         self.ui = arcade.gui.UIManager()
+        self.size_buttons = {}  # Maze size -> button
+        self.color_buttons = {}  # Mouse color -> button
+        self.generator_buttons = {}  # Maze generator name -> button
         
         # Create main layout
         root = arcade.gui.UIAnchorLayout()
@@ -279,46 +305,77 @@ class SettingsView(arcade.View):
             small_button = arcade.gui.UIFlatButton(
                 text="Small",
                 width=UI_BUTTON_WIDTH_TINY,
-                height=UI_BUTTON_HEIGHT_SMALL,
-                style=arcade.gui.UIFlatButton.STYLE_BLUE if constants.MAZE_SIZE_SETTING == 21 else None
+                height=UI_BUTTON_HEIGHT_SMALL
             )
             size_button_box.add(small_button)
+            self.size_buttons[21] = small_button
             
             @small_button.event("on_click")
             def on_small_click(_):
                 constants.MAZE_SIZE_SETTING = 21
-                self.view_manager.show_settings(previous_view=self.previous_view, game_mode=self.game_mode)
+                self.show_selection()
             
             medium_button = arcade.gui.UIFlatButton(
                 text="Medium",
                 width=UI_BUTTON_WIDTH_TINY,
-                height=UI_BUTTON_HEIGHT_SMALL,
-                style=arcade.gui.UIFlatButton.STYLE_BLUE if constants.MAZE_SIZE_SETTING == 31 else None
+                height=UI_BUTTON_HEIGHT_SMALL
             )
             size_button_box.add(medium_button)
+            self.size_buttons[31] = medium_button
             
             @medium_button.event("on_click")
             def on_medium_click(_):
                 constants.MAZE_SIZE_SETTING = 31
-                self.view_manager.show_settings(previous_view=self.previous_view, game_mode=self.game_mode)
+                self.show_selection()
             
             large_button = arcade.gui.UIFlatButton(
                 text="Large",
                 width=UI_BUTTON_WIDTH_TINY,
-                height=UI_BUTTON_HEIGHT_SMALL,
-                style=arcade.gui.UIFlatButton.STYLE_BLUE if constants.MAZE_SIZE_SETTING == 51 else None
+                height=UI_BUTTON_HEIGHT_SMALL
             )
             size_button_box.add(large_button)
+            self.size_buttons[51] = large_button
             
             @large_button.event("on_click")
             def on_large_click(_):
                 constants.MAZE_SIZE_SETTING = 51
-                self.view_manager.show_settings(previous_view=self.previous_view, game_mode=self.game_mode)
+                self.show_selection()
             
             menu_box.add(size_button_box)
             
             menu_box.add(arcade.gui.UISpace(height=UI_SPACING_SMALL))
 
+            # Maze generator section (takes effect from the next game)
+            generator_label = arcade.gui.UILabel(
+                text="Maze Generator",
+                font_size=20,
+                text_color=arcade.color.WHITE,
+                bold=True
+            )
+            menu_box.add(generator_label)
+
+            menu_box.add(arcade.gui.UISpace(height=5))
+
+            # One button per registered generator
+            generator_button_box = arcade.gui.UIBoxLayout(vertical=False, space_between=UI_SPACING_TINY)
+            for name, (label, _) in GENERATORS.items():
+                generator_button = arcade.gui.UIFlatButton(
+                    text=label,
+                    width=UI_BUTTON_WIDTH_TINY,
+                    height=UI_BUTTON_HEIGHT_SMALL
+                )
+                generator_button_box.add(generator_button)
+                self.generator_buttons[name] = generator_button
+
+                @generator_button.event("on_click")
+                def on_generator_click(_, name=name):
+                    constants.MAZE_GENERATOR_SETTING = name
+                    self.show_selection()
+
+            menu_box.add(generator_button_box)
+
+            menu_box.add(arcade.gui.UISpace(height=UI_SPACING_SMALL))
+
             # Mouse color section
             mouse_label = arcade.gui.UILabel(
                 text="Mouse Color",
@@ -336,41 +393,42 @@ class SettingsView(arcade.View):
             white_button = arcade.gui.UIFlatButton(
                 text="White",
                 width=UI_BUTTON_WIDTH_TINY,
-                height=UI_BUTTON_HEIGHT_SMALL,
-                style=arcade.gui.UIFlatButton.STYLE_BLUE if constants.MOUSE_COLOR_SETTING == "white" else None
+                height=UI_BUTTON_HEIGHT_SMALL
             )
             mouse_button_box.add(white_button)
+            self.color_buttons["white"] = white_button
             
             @white_button.event("on_click")
             def on_white_click(_):
                 constants.MOUSE_COLOR_SETTING = "white"
-                self.view_manager.show_settings(previous_view=self.previous_view, game_mode=self.game_mode)
+                self.show_selection()
             
             grey_button = arcade.gui.UIFlatButton(
                 text="Grey",
                 width=UI_BUTTON_WIDTH_TINY,
-                height=UI_BUTTON_HEIGHT_SMALL,
-                style=arcade.gui.UIFlatButton.STYLE_BLUE if constants.MOUSE_COLOR_SETTING == "grey" else None
+                height=UI_BUTTON_HEIGHT_SMALL
             )
             mouse_button_box.add(grey_button)
+            self.color_buttons["grey"] = grey_button
             
             @grey_button.event("on_click")
             def on_grey_click(_):
                 constants.MOUSE_COLOR_SETTING = "grey"
-                self.view_manager.show_settings(previous_view=self.previous_view, game_mode=self.game_mode)
+                self.show_selection()
             
             brown_button = arcade.gui.UIFlatButton(
                 text="Brown",
                 width=UI_BUTTON_WIDTH_TINY,
-                height=UI_BUTTON_HEIGHT_SMALL,
-                style=arcade.gui.UIFlatButton.STYLE_BLUE if constants.MOUSE_COLOR_SETTING == "brown" else None
+                height=UI_BUTTON_HEIGHT_SMALL
             )
             mouse_button_box.add(brown_button)
+            self.color_buttons["brown"] = brown_button
             
             @brown_button.event("on_click")
             def on_brown_click(_):
                 constants.MOUSE_COLOR_SETTING = "brown"
-                self.view_manager.show_settings(previous_view=self.previous_view, game_mode=self.game_mode)            
+                self.show_selection()
+
             menu_box.add(mouse_button_box)
             
             menu_box.add(arcade.gui.UISpace(height=UI_SPACING_SMALL))
@@ -386,49 +444,48 @@ class SettingsView(arcade.View):
         )
         volume_header_box.add(volume_label)
         
-        # Volume percentage display
-        volume_percent = int(constants.VOLUME_SETTING * 100)
-        volume_display = arcade.gui.UILabel(
-            text=f"{volume_percent}%",
+        # Volume percentage display (wide enough for 100%, so the row doesn't shift as it changes)
+        self.volume_display = arcade.gui.UILabel(
+            text="100%",
             font_size=20,
             text_color=arcade.color.YELLOW,
             bold=True
         )
-        volume_header_box.add(volume_display)
+        volume_header_box.add(self.volume_display)
         
         menu_box.add(volume_header_box)
         
         menu_box.add(arcade.gui.UISpace(height=5))
         
         # Volume slider
-        volume_slider = arcade.gui.UISlider(
+        self.volume_slider = arcade.gui.UISlider(
             value=constants.VOLUME_SETTING * 100,  # Convert to 0-100 range
             min_value=0,
             max_value=100,
             width=UI_BUTTON_WIDTH_LARGE,
             height=20
         )
-        menu_box.add(volume_slider)
+        menu_box.add(self.volume_slider)
         
-        @volume_slider.event("on_change")
+        @self.volume_slider.event("on_change")
         def on_slider_change(event):
             constants.VOLUME_SETTING = event.new_value / 100.0  # Convert back to 0.0-1.0
+            get_music().update_volume()
             # Update the volume display label
-            volume_display.text = f"{int(event.new_value)}%"
+            self.volume_display.text = f"{int(event.new_value)}%"
         
         menu_box.add(arcade.gui.UISpace(height=UI_SPACING_SMALL))
         
         # Back button - returns to previous view or main menu
-        back_text = "Back" if self.previous_view else "Back to Main Menu"
-        back_button = arcade.gui.UIFlatButton(
-            text=back_text,
+        self.back_button = arcade.gui.UIFlatButton(
+            text="Back to Main Menu",
             width=UI_BUTTON_WIDTH_LARGE,
             height=UI_BUTTON_HEIGHT_MEDIUM,
             style=arcade.gui.UIFlatButton.STYLE_BLUE
         )
-        menu_box.add(back_button)
+        menu_box.add(self.back_button)
         
-        @back_button.event("on_click")
+        @self.back_button.event("on_click")
         def on_back_click(_):
             if self.previous_view:
                 # Return to the view that opened settings (e.g., InGameMenuView)
@@ -441,6 +498,23 @@ class SettingsView(arcade.View):
         root.add(menu_box, anchor_x="center", anchor_y="center")
         self.ui.add(root)
 
+    def refresh(self, previous_view=None):
+        """ Point the view at the view that opened it and show the current settings """
+        self.previous_view = previous_view
+        self.back_button.text = "Back" if previous_view else "Back to Main Menu"
+        self.volume_slider.value = constants.VOLUME_SETTING * 100
+        self.volume_display.text = f"{int(constants.VOLUME_SETTING * 100)}%"
+        self.show_selection()
+
+    def show_selection(self):
+        """ Highlight the selected maze size, maze generator and mouse color """
+        for size, button in self.size_buttons.items():
+            highlight_button(button, constants.MAZE_SIZE_SETTING == size)
+        for name, button in self.generator_buttons.items():
+            highlight_button(button, constants.MAZE_GENERATOR_SETTING == name)
+        for color, button in self.color_buttons.items():
+            highlight_button(button, constants.MOUSE_COLOR_SETTING == color)
+
     def on_show_view(self):
         """ This is run once when we switch to this view """
         arcade.set_background_color(arcade.color.TEAL)
@@ -456,11 +530,12 @@ class SettingsView(arcade.View):
         self.ui.draw()
 
 # In-Game Pause Menu with GUI widgets
+# Built once; refresh() points it at the game being paused
 class InGameMenuView(arcade.View):
 
-    def __init__(self, view_manager, game_view):
+    def __init__(self, view_manager):
         super().__init__()
-        self.game_view = game_view
+        self.game_view = None
         self.view_manager = view_manager
         self.ui = arcade.gui.UIManager()
         
@@ -505,7 +580,6 @@ class InGameMenuView(arcade.View):
         
         @settings_button.event("on_click")
         def on_settings_click(_):
-            from view_manager import GameMode
             self.view_manager.show_settings(previous_view=self, game_mode=self.game_view.game_mode)
 
         
@@ -548,14 +622,15 @@ class InGameMenuView(arcade.View):
         root.add(menu_box, anchor_x="center", anchor_y="center")
         self.ui.add(root)
 
+    def refresh(self, game_view):
+        """ Point the menu at the game being paused """
+        self.game_view = game_view
+
     def on_show_view(self):
         """ This is run once when we switch to this view """
         # Clear pathfinder when showing pause menu
         if self.game_view.pathfinder_active:
             self.game_view.clear_pathfinder()
-            # Restore black tile
-            if len(self.game_view.path_list) == 0:
-                self.game_view._create_exit_black_tile()
         self.ui.enable()
 
     def on_hide_view(self):
@@ -580,12 +655,13 @@ class InGameMenuView(arcade.View):
         self.ui.draw()
 
 # Congratulations View with GUI widgets
+# Built once; refresh() fills in the results of the maze just completed
 class CongratulationsView(arcade.View):
 
-    def __init__(self, view_manager, game_view):
+    def __init__(self, view_manager):
         super().__init__()
         self.view_manager = view_manager
-        self.game_view = game_view
+        self.game_view = None
         self.display_timer = 0
         self.ui = arcade.gui.UIManager()
         
@@ -614,56 +690,45 @@ class CongratulationsView(arcade.View):
         
         content_box.add(arcade.gui.UISpace(height=30))
 
-        # Add score label
-        score_text = f"Score: {self.game_view.score}"
-        score_label = arcade.gui.UILabel(
-            text=score_text,
+        # Add score label (the result labels are filled in by refresh())
+        self.score_label = arcade.gui.UILabel(
+            text="",
             font_size=15,
             text_color=arcade.color.LIGHT_GRAY
         )
-        content_box.add(score_label)
+        content_box.add(self.score_label)
 
         # Add total score label
-        grand_total_score_text = f"Total Score: {self.game_view.grand_total_score}"
-        grand_total_score_label = arcade.gui.UILabel(
-            text=grand_total_score_text,
+        self.grand_total_score_label = arcade.gui.UILabel(
+            text="",
             font_size=15,
             text_color=arcade.color.LIGHT_GRAY
         )
-        content_box.add(grand_total_score_label)
+        content_box.add(self.grand_total_score_label)
         
         # Add time label
-        time_text = f"Time: {self.game_view.elapsed_time:.3f} s"
-        time_label = arcade.gui.UILabel(
-            text=time_text,
+        self.time_label = arcade.gui.UILabel(
+            text="",
             font_size=15,
             text_color=arcade.color.LIGHT_GRAY
         )
-        content_box.add(time_label)
+        content_box.add(self.time_label)
         
-        # Add best time if it exists
-        if self.game_view.best_time is not None:
-            if (self.game_view.elapsed_time < self.game_view.best_time):
-                best_time_label = arcade.gui.UILabel(
-                text=f"Best Time: {self.game_view.elapsed_time:.3f} s",
-                font_size=15,
-                text_color=arcade.color.YELLOW
-            )
-            else:
-                best_time_label = arcade.gui.UILabel(
-                text=f"Best Time: {self.game_view.best_time:.3f} s",
-                font_size=15,
-                text_color=arcade.color.YELLOW
-            )
-            content_box.add(best_time_label)
+        # Add best time label, only shown once a best time exists
+        self.best_time_label = arcade.gui.UILabel(
+            text="",
+            font_size=15,
+            text_color=arcade.color.YELLOW
+        )
+        content_box.add(self.best_time_label)
         
-        # Add completed mazes count (add 1 since this maze was just completed)
-        mazes_label = arcade.gui.UILabel(
-            text=f"Mazes Completed: {self.game_view.completed_mazes + 1}",
+        # Add completed mazes count
+        self.mazes_label = arcade.gui.UILabel(
+            text="",
             font_size=15,
             text_color=arcade.color.LIGHT_GRAY
         )
-        content_box.add(mazes_label)
+        content_box.add(self.mazes_label)
         
         content_box.add(arcade.gui.UISpace(height=UI_SPACING_LARGE))
         
@@ -710,16 +775,8 @@ class CongratulationsView(arcade.View):
         
         @next_button.event("on_click")
         def on_next_click(_):
-            # Update best time
-            if self.game_view.best_time is None or self.game_view.elapsed_time < self.game_view.best_time:
-                self.game_view.best_time = self.game_view.elapsed_time
-            
-            # Increment completed mazes counter
-            self.game_view.completed_mazes += 1
-            # Reset elapsed time
-            self.game_view.elapsed_time = 0
-            # Generate new maze
-            self.game_view.setup()
+            # Record the time and generate a new maze
+            self.game_view.advance_to_next_maze()
             # Return to game view
             self.window.show_view(self.game_view)
         
@@ -738,6 +795,23 @@ class CongratulationsView(arcade.View):
         root.add(content_box, anchor_x="center", anchor_y="center")
         self.ui.add(root)
 
+    def refresh(self, game_view):
+        """ Show the results of the maze the game just completed """
+        self.game_view = game_view
+        self.score_label.text = f"Score: {game_view.score}"
+        self.grand_total_score_label.text = f"Total Score: {game_view.grand_total_score}"
+        self.time_label.text = f"Time: {game_view.elapsed_time:.3f} s"
+
+        # Best time including this maze, hidden (and left out of the layout) until there is one
+        if game_view.best_time is not None:
+            self.best_time_label.text = f"Best Time: {min(game_view.elapsed_time, game_view.best_time):.3f} s"
+            self.best_time_label.visible = True
+        else:
+            self.best_time_label.visible = None
+
+        # Add 1 since this maze was just completed
+        self.mazes_label.text = f"Mazes Completed: {game_view.completed_mazes + 1}"
+
     def on_show_view(self):
         """ This is run once when we switch to this view """
         arcade.set_background_color(arcade.color.TEAL)
@@ -757,26 +831,19 @@ class CongratulationsView(arcade.View):
         """ Update the view """
         self.display_timer += delta_time
         if self.display_timer >= CONGRATULATIONS_DELAY:  # After a few seconds
-            # Update best time
-            if self.game_view.best_time is None or self.game_view.elapsed_time < self.game_view.best_time:
-                self.game_view.best_time = self.game_view.elapsed_time
-
-            # Increment completed mazes counter
-            self.game_view.completed_mazes += 1
-            # Reset elapsed time
-            self.game_view.elapsed_time = 0
-            # Generate new maze
-            self.game_view.setup()
+            # Record the time and generate a new maze
+            self.game_view.advance_to_next_maze()
             # Return to game view
             self.window.show_view(self.game_view)
 
 # Grand victory shown when player completes all 10 mazes in story mode
+# Built once; refresh() fills in the totals of the finished story
 class StoryVictoryView(arcade.View):
 
-    def __init__(self, view_manager, game_view):
+    def __init__(self, view_manager):
         super().__init__()
         self.view_manager = view_manager
-        self.game_view = game_view
+        self.game_view = None
         self.ui = arcade.gui.UIManager()
         
         # Create main layout
@@ -804,24 +871,21 @@ class StoryVictoryView(arcade.View):
         
         content_box.add(arcade.gui.UISpace(height=UI_SPACING_LARGE))
         
-        # Add statistics
-        total_score_text = f"Total Cheese Collected: {self.game_view.grand_total_score}"
-        score_label = arcade.gui.UILabel(
-            text=total_score_text,
+        # Add statistics (filled in by refresh())
+        self.score_label = arcade.gui.UILabel(
+            text="",
             font_size=20,
             text_color=arcade.color.YELLOW
         )
-        content_box.add(score_label)
+        content_box.add(self.score_label)
         
-        # Add total time if tracked
-        if hasattr(game_view, 'total_story_time'):
-            time_text = f"Total Time: {self.game_view.total_story_time:.2f} seconds"
-            time_label = arcade.gui.UILabel(
-                text=time_text,
-                font_size=20,
-                text_color=arcade.color.WHITE
-            )
-            content_box.add(time_label)
+        # Add total time
+        self.time_label = arcade.gui.UILabel(
+            text="",
+            font_size=20,
+            text_color=arcade.color.WHITE
+        )
+        content_box.add(self.time_label)
         
         content_box.add(arcade.gui.UISpace(height=UI_SPACING_LARGE))
         
@@ -842,6 +906,12 @@ class StoryVictoryView(arcade.View):
         root.add(content_box, anchor_x="center", anchor_y="center")
         self.ui.add(root)
 
+    def refresh(self, game_view):
+        """ Show the totals of the story the game just finished """
+        self.game_view = game_view
+        self.score_label.text = f"Total Cheese Collected: {game_view.grand_total_score}"
+        self.time_label.text = f"Total Time: {game_view.total_story_time:.2f} seconds"
+
     def on_show_view(self):
         """ This is run once when we switch to this view """
         arcade.set_background_color(arcade.color.TEAL)